@@ -3,15 +3,17 @@ UPI Data Intelligence Platform — Main Streamlit Application
 Premium AI-powered analytics engine for UPI financial transaction data.
 """
 import streamlit as st
-import pandas as pd
+import io
 import os
+import re
 import sys
 import time
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.data_profiler import load_and_profile
+from src.data_profiler import load_and_profile, load_and_profile_cached, read_csv
+from src.utils import format_currency, format_number
 
 # --- Page Config ---
 st.set_page_config(
@@ -515,7 +517,50 @@ PREMIUM_CSS = """
 </style>
 """
 
-st.markdown(PREMIUM_CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def _premium_css():
+    """Minify PREMIUM_CSS once per server process instead of on every rerun."""
+    css = re.sub(r"/\*.*?\*/", "", PREMIUM_CSS, flags=re.S)
+    return re.sub(r"\s+", " ", css).strip()
+
+
+# Streamlit drops any element not re-emitted during a run, so the <style> block
+# still has to be written on every rerun; only the minified string is cached.
+st.markdown(_premium_css(), unsafe_allow_html=True)
+
+
+# =====================================================
+# STATIC HTML (built once at import, not per rerun)
+# =====================================================
+HERO_HTML = """
+<div class="hero-banner">
+    <h1>🧠 UPI Data Intelligence Platform</h1>
+    <p>AI-powered analytics engine — Ask anything about your UPI transaction data</p>
+</div>
+"""
+
+NAV_ITEMS = [
+    ("📊", "Executive Overview", "KPIs & trends"),
+    ("🧠", "Ask AI", "Natural language queries"),
+    ("🔍", "Explore Data", "Filter & aggregate"),
+    ("💡", "Insights", "Auto-generated intelligence"),
+    ("📈", "Risk Analysis", "Concentration & volatility"),
+    ("⚠️", "Anomalies", "Multi-method detection"),
+    ("⚖️", "Compare", "Side-by-side analysis"),
+    ("🧹", "Data Quality", "Quality assessment"),
+    ("🔮", "Predictions", "Forecasting & scenarios"),
+    ("📖", "Documentation", "Architecture & docs"),
+]
+
+NAV_HTML = '<div class="nav-grid">' + "".join(f'''
+        <div class="nav-item">
+            <div class="nav-item-icon">{icon}</div>
+            <div class="nav-item-title">{title}</div>
+            <div class="nav-item-desc">{desc}</div>
+        </div>''' for icon, title, desc in NAV_ITEMS) + '</div>'
+
+FOOTER_HTML = '<div class="data-footer">Data Source: UPI Transactions 2024 (Synthetic) · Built with Streamlit · Zero Hallucination Engine</div>'
 
 
 # =====================================================
@@ -565,7 +610,31 @@ def render_insight(icon, title, body, category="", border_color="#4f46e5"):
 
 def render_footer():
     """Render standard data footer."""
-    return '<div class="data-footer">Data Source: UPI Transactions 2024 (Synthetic) · Built with Streamlit · Zero Hallucination Engine</div>'
+    return FOOTER_HTML
+
+
+@st.cache_data(show_spinner=False)
+def load_dataset(filepath, mtime):
+    """Load a dataset file; `mtime` is part of the cache key so edits invalidate it."""
+    return load_and_profile_cached(filepath)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _profile_upload(raw):
+    """Read and profile uploaded CSV bytes; identical uploads hit the cache."""
+    return load_and_profile(read_csv(io.BytesIO(raw)))
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _list_csvs(data_dir):
+    """(name, mtime) of CSV files in data_dir; rescanned at most every 10s."""
+    if not os.path.isdir(data_dir):
+        return []
+    with os.scandir(data_dir) as it:
+        return sorted((e.name, e.stat().st_mtime) for e in it if e.name.endswith('.csv'))
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 
 
 def auto_load_data():
@@ -573,18 +642,16 @@ def auto_load_data():
     if 'df' in st.session_state and st.session_state.df is not None:
         return st.session_state.df, st.session_state.metadata
 
-    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-    if os.path.exists(data_dir):
-        csv_files = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
-        if csv_files:
-            filepath = os.path.join(data_dir, csv_files[0])
-            load_start = time.time()
-            df, metadata = load_and_profile(filepath)
-            load_time = round((time.time() - load_start) * 1000, 0)
-            st.session_state.df = df
-            st.session_state.metadata = metadata
-            st.session_state.load_time_ms = load_time
-            return df, metadata
+    csv_files = _list_csvs(DATA_DIR)
+    if csv_files:
+        name, mtime = csv_files[0]
+        load_start = time.time()
+        df, metadata = load_dataset(os.path.join(DATA_DIR, name), mtime)
+        load_time = round((time.time() - load_start) * 1000, 0)
+        st.session_state.df = df
+        st.session_state.metadata = metadata
+        st.session_state.load_time_ms = load_time
+        return df, metadata
     return None, None
 
 
@@ -601,27 +668,26 @@ with st.sidebar:
     st.divider()
 
     # Data source controls
-    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-    if os.path.exists(data_dir):
-        csv_files = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
-        if csv_files:
-            st.selectbox("Dataset", csv_files, key="sidebar_dataset")
-            if st.button("↻ Reload", use_container_width=True):
-                filepath = os.path.join(data_dir, csv_files[0])
-                with st.spinner("Loading..."):
-                    load_start = time.time()
-                    df, metadata = load_and_profile(filepath)
-                    st.session_state.df = df
-                    st.session_state.metadata = metadata
-                    st.session_state.load_time_ms = round((time.time() - load_start) * 1000, 0)
-                    st.rerun()
+    csv_files = _list_csvs(DATA_DIR)
+    if csv_files:
+        st.selectbox("Dataset", [name for name, _ in csv_files], key="sidebar_dataset")
+        if st.button("↻ Reload", use_container_width=True):
+            name, mtime = csv_files[0]
+            with st.spinner("Loading..."):
+                load_start = time.time()
+                df, metadata = load_dataset(os.path.join(DATA_DIR, name), mtime)
+                st.session_state.df = df
+                st.session_state.metadata = metadata
+                st.session_state.load_time_ms = round((time.time() - load_start) * 1000, 0)
+                st.rerun()
 
     uploaded = st.file_uploader("Upload CSV", type=['csv'])
-    if uploaded:
+    # The widget keeps its file across reruns; only load it the first time we see it
+    if uploaded and st.session_state.get('upload_id') != uploaded.file_id:
         with st.spinner("Profiling..."):
-            df_up = pd.read_csv(uploaded)
             load_start = time.time()
-            df_up, meta = load_and_profile(df_up)
+            df_up, meta = _profile_upload(uploaded.getvalue())
+            st.session_state.upload_id = uploaded.file_id
             st.session_state.df = df_up
             st.session_state.metadata = meta
             st.session_state.load_time_ms = round((time.time() - load_start) * 1000, 0)
@@ -637,33 +703,9 @@ with st.sidebar:
 df, metadata = auto_load_data()
 
 
-# =====================================================
-# MAIN PAGE CONTENT
-# =====================================================
-st.markdown("""
-<div class="hero-banner">
-    <h1>🧠 UPI Data Intelligence Platform</h1>
-    <p>AI-powered analytics engine — Ask anything about your UPI transaction data</p>
-</div>
-""", unsafe_allow_html=True)
-
-if df is None:
-    st.info("👈 **Upload a CSV** or place a file in the `data/` folder to get started.")
-    st.markdown("""
-    ### Capabilities
-    | Feature | Description |
-    |---------|-------------|
-    | 🧠 Ask AI | Natural language → structured analytics |
-    | 📊 Overview | Executive KPIs and growth metrics |
-    | 🔍 Explore | Multi-condition filter & search |
-    | 💡 Insights | Auto-generated financial intelligence |
-    | ⚠️ Anomalies | IQR, Z-score, percentile detection |
-    | 📈 Risk | Concentration, volatility, HHI index |
-    | ⚖️ Compare | Side-by-side group analysis |
-    | 🔮 Predict | Trend forecasting & what-if simulation |
-    """)
-else:
-    from src.utils import format_currency, format_number
+@st.fragment
+def render_main(df, metadata):
+    """KPIs, dataset profile and navigation; runs as a fragment so its own reruns stay local."""
     roles = metadata.get('roles', {})
     amount_col = roles.get('amount')
 
@@ -673,10 +715,10 @@ else:
         st.markdown(render_kpi("Total Transactions", format_number(len(df))), unsafe_allow_html=True)
     with c2:
         if amount_col:
-            st.markdown(render_kpi("Total Value", format_currency(df[amount_col].sum()), "kpi-accent"), unsafe_allow_html=True)
+            st.markdown(render_kpi("Total Value", format_currency(metadata['total_value']), "kpi-accent"), unsafe_allow_html=True)
     with c3:
         if amount_col:
-            st.markdown(render_kpi("Avg Transaction", format_currency(df[amount_col].mean())), unsafe_allow_html=True)
+            st.markdown(render_kpi("Avg Transaction", format_currency(metadata['avg_value'])), unsafe_allow_html=True)
     with c4:
         date_range = metadata.get('date_range', {})
         months = date_range.get('months', len(df.columns))
@@ -698,35 +740,37 @@ else:
             st.write(f"📅 **Range:** {dr.get('start', 'N/A')} → {dr.get('end', 'N/A')}")
         st.write(f"📊 **Shape:** {len(df):,} rows × {len(df.columns)} columns")
         st.write(f"🔄 **Duplicates:** {metadata.get('duplicate_rows', 0)}")
-        st.write(f"⚠️ **Missing:** {sum(df.isnull().sum())} cells")
+        st.write(f"⚠️ **Missing:** {metadata.get('missing_cells', 0)} cells")
 
     st.divider()
 
     # Navigation Grid
     st.markdown('<div class="section-label">Quick Navigation</div>', unsafe_allow_html=True)
 
-    nav = [
-        ("📊", "Executive Overview", "KPIs & trends"),
-        ("🧠", "Ask AI", "Natural language queries"),
-        ("🔍", "Explore Data", "Filter & aggregate"),
-        ("💡", "Insights", "Auto-generated intelligence"),
-        ("📈", "Risk Analysis", "Concentration & volatility"),
-        ("⚠️", "Anomalies", "Multi-method detection"),
-        ("⚖️", "Compare", "Side-by-side analysis"),
-        ("🧹", "Data Quality", "Quality assessment"),
-        ("🔮", "Predictions", "Forecasting & scenarios"),
-        ("📖", "Documentation", "Architecture & docs"),
-    ]
-
-    nav_html = '<div class="nav-grid">'
-    for icon, title, desc in nav:
-        nav_html += f'''
-        <div class="nav-item">
-            <div class="nav-item-icon">{icon}</div>
-            <div class="nav-item-title">{title}</div>
-            <div class="nav-item-desc">{desc}</div>
-        </div>'''
-    nav_html += '</div>'
-    st.markdown(nav_html, unsafe_allow_html=True)
+    st.markdown(NAV_HTML, unsafe_allow_html=True)
 
     st.markdown(render_footer(), unsafe_allow_html=True)
+
+
+# =====================================================
+# MAIN PAGE CONTENT
+# =====================================================
+st.markdown(HERO_HTML, unsafe_allow_html=True)
+
+if df is None:
+    st.info("👈 **Upload a CSV** or place a file in the `data/` folder to get started.")
+    st.markdown("""
+    ### Capabilities
+    | Feature | Description |
+    |---------|-------------|
+    | 🧠 Ask AI | Natural language → structured analytics |
+    | 📊 Overview | Executive KPIs and growth metrics |
+    | 🔍 Explore | Multi-condition filter & search |
+    | 💡 Insights | Auto-generated financial intelligence |
+    | ⚠️ Anomalies | IQR, Z-score, percentile detection |
+    | 📈 Risk | Concentration, volatility, HHI index |
+    | ⚖️ Compare | Side-by-side group analysis |
+    | 🔮 Predict | Trend forecasting & what-if simulation |
+    """)
+else:
+    render_main(df, metadata)
@@ -2,10 +2,18 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["anomalies"])
+from src.anomaly_detector import (
+    run_full_anomaly_detection, detect_iqr_anomalies,
+    detect_zscore_anomalies, detect_percentile_anomalies,
+)
+from src.utils import to_records
+from main import DATA, CACHE, single_flight, ORJSONRoute
+
+router = APIRouter(tags=["anomalies"], route_class=ORJSONRoute)
+
+# Rows returned per method; detectors only materialize this many
+MAX_ROWS = 20
 
 
 class AnomalyRequest(BaseModel):
@@ -16,14 +24,10 @@ class AnomalyRequest(BaseModel):
 
 @router.post("/anomalies")
 async def detect_anomalies(req: AnomalyRequest):
-    from main import DATA, CACHE
-    cache_key = f"anomalies_{req.method}"
-    if cache_key in CACHE:
-        return CACHE[cache_key]
-    from src.anomaly_detector import (
-        run_full_anomaly_detection, detect_iqr_anomalies,
-        detect_zscore_anomalies, detect_percentile_anomalies
-    )
+    cache_key = f"anomalies:{DATA['version']}:{req.method}_{req.iqr_multiplier}_{req.zscore_threshold}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
@@ -34,44 +38,49 @@ async def detect_anomalies(req: AnomalyRequest):
     if not amount_col:
         return {"error": "No amount column"}
 
+    result = await single_flight(cache_key, _run_detection, df, meta, amount_col, req)
+    CACHE[cache_key] = result
+    return result
+
+
+def _run_detection(df, meta, amount_col, req):
+    """Run the requested detector(s) and serialize the first rows of each result."""
     if req.method == "iqr":
-        anomalies, stats = detect_iqr_anomalies(df, amount_col, multiplier=req.iqr_multiplier)
+        anomalies, stats = detect_iqr_anomalies(df, amount_col, multiplier=req.iqr_multiplier, stats=meta.get("amount_stats"), limit=MAX_ROWS)
         results = {"IQR Method": {
-            "anomalies": anomalies.head(20).to_dict(orient="records"),
-            "count": len(anomalies),
-            "description": f"Found {len(anomalies)} anomalies using IQR ({req.iqr_multiplier}x)."
+            "anomalies": to_records(anomalies),
+            "count": stats["count"],
+            "description": f"Found {stats['count']} anomalies using IQR ({req.iqr_multiplier}x)."
         }}
     elif req.method == "zscore":
-        anomalies, stats = detect_zscore_anomalies(df, amount_col, threshold=req.zscore_threshold)
+        anomalies, stats = detect_zscore_anomalies(df, amount_col, threshold=req.zscore_threshold, stats=meta.get("amount_stats"), limit=MAX_ROWS)
         results = {"Z-Score Method": {
-            "anomalies": anomalies.head(20).to_dict(orient="records"),
-            "count": len(anomalies),
-            "description": f"Found {len(anomalies)} anomalies with |Z| > {req.zscore_threshold}."
+            "anomalies": to_records(anomalies),
+            "count": stats["count"],
+            "description": f"Found {stats['count']} anomalies with |Z| > {req.zscore_threshold}."
         }}
     elif req.method == "percentile":
-        anomalies, stats = detect_percentile_anomalies(df, amount_col)
+        anomalies, stats = detect_percentile_anomalies(df, amount_col, stats=meta.get("amount_stats"), limit=MAX_ROWS)
         results = {"Percentile": {
-            "anomalies": anomalies.head(20).to_dict(orient="records"),
-            "count": len(anomalies),
-            "description": f"Found {len(anomalies)} anomalies outside 1st-99th percentile."
+            "anomalies": to_records(anomalies),
+            "count": stats["count"],
+            "description": f"Found {stats['count']} anomalies outside 1st-99th percentile."
         }}
     else:
-        raw_results = run_full_anomaly_detection(df, meta, method=req.method)
+        raw_results = run_full_anomaly_detection(df, meta, method=req.method, limit=MAX_ROWS)
         results = {}
         for name, r in raw_results.items():
             anom_df = r.get("anomalies")
             results[name] = {
-                "anomalies": anom_df.head(20).to_dict(orient="records") if anom_df is not None and len(anom_df) > 0 else [],
+                "anomalies": to_records(anom_df.head(MAX_ROWS)) if anom_df is not None and len(anom_df) > 0 else [],
                 "count": r["count"],
                 "description": r["description"],
             }
 
     total = sum(r["count"] for r in results.values())
-    result = {
+    return {
         "results": results,
         "total_anomalies": total,
         "anomaly_rate": round(total / len(df) * 100, 2),
         "methods_used": len(results),
     }
-    CACHE[cache_key] = result
-    return result
@@ -0,0 +1,26 @@
+"""Dashboard API — Overview, risk, quality and schema in one round-trip."""
+from fastapi import APIRouter
+import asyncio
+
+from api.overview import get_overview
+from api.risk import get_risk
+from api.quality import get_quality
+from api.upload import get_schema
+from main import DATA, ORJSONRoute
+
+router = APIRouter(tags=["dashboard"], route_class=ORJSONRoute)
+
+
+@router.get("/dashboard")
+async def get_dashboard():
+    """
+    Everything the landing page needs. The sections share the per-endpoint CACHE and
+    their pandas work runs concurrently in worker threads.
+    """
+    if DATA["df"] is None:
+        return {"error": "No data loaded"}
+
+    overview, risk, quality, schema = await asyncio.gather(
+        get_overview(), get_risk(), get_quality(), get_schema()
+    )
+    return {"overview": overview, "risk": risk, "quality": quality, "schema": schema}
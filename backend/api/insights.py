@@ -1,24 +1,26 @@
 """Insights API — Auto-generated intelligence."""
 from fastapi import APIRouter
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["insights"])
+from src.insight_engine import generate_insights
+from main import DATA, CACHE, single_flight, ORJSONRoute
+
+router = APIRouter(tags=["insights"], route_class=ORJSONRoute)
 
 
 @router.get("/insights")
 async def get_insights():
-    from main import DATA, CACHE
-    if "insights" in CACHE:
-        return CACHE["insights"]
-    from src.insight_engine import generate_insights
+    # Keyed by dataset so a computation that finishes after a reload can't serve stale insights
+    cache_key = f"insights:{DATA['version']}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
         return {"error": "No data loaded"}
 
-    insights = generate_insights(df, meta)
+    insights = await single_flight(cache_key, generate_insights, df, meta)
     result = {"insights": insights, "count": len(insights)}
-    CACHE["insights"] = result
+    CACHE[cache_key] = result
     return result
@@ -1,43 +1,57 @@
 """Overview API — KPIs, profile, stats."""
 from fastapi import APIRouter
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["overview"])
+from src.utils import safe_divide, monthly_sum_count, group_sum, to_records, fast_median, count_value
+from main import DATA, CACHE, single_flight, ORJSONRoute
+from api.risk import risk_summary
+
+router = APIRouter(tags=["overview"], route_class=ORJSONRoute)
 
 
 @router.get("/overview")
 async def get_overview():
-    from main import DATA, CACHE
-    if "overview" in CACHE:
-        return CACHE["overview"]
-    from src.risk_analyzer import compute_risk_summary
-    from src.utils import safe_divide
+    cache_key = f"overview:{DATA['version']}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
         return {"error": "No data loaded"}
 
+    risk = await risk_summary(df, meta)
+    result = await single_flight(cache_key, _build_overview, df, meta, DATA["load_time_ms"], risk)
+    CACHE[cache_key] = result
+    return result
+
+
+def _build_overview(df, meta, load_time_ms, risk):
+    """KPIs, monthly trend and top breakdowns for /overview (blocking pandas work)."""
     roles = meta.get("roles", {})
     amount_col = roles.get("amount")
     date_col = roles.get("date")
     status_col = roles.get("status")
     fraud_col = roles.get("fraud")
 
-    risk = compute_risk_summary(df, meta)
+    # Amount totals were computed once by load_and_profile; only fall back to the column
+    if amount_col and "median_value" in meta:
+        total_value, avg_value, median_value = meta["total_value"], meta["avg_value"], meta["median_value"]
+    elif amount_col:
+        amounts = df[amount_col]
+        total_value, avg_value, median_value = amounts.sum(), amounts.mean(), fast_median(amounts)
 
     kpis = {
         "total_transactions": int(len(df)),
-        "total_value": float(df[amount_col].sum()) if amount_col else 0,
-        "avg_transaction": float(df[amount_col].mean()) if amount_col else 0,
-        "median_transaction": float(df[amount_col].median()) if amount_col else 0,
+        "total_value": float(total_value) if amount_col else 0,
+        "avg_transaction": float(avg_value) if amount_col else 0,
+        "median_transaction": float(median_value) if amount_col else 0,
         "risk_index": risk.get("risk_index", 0),
         "risk_level": risk.get("risk_level", "N/A"),
     }
 
     if status_col:
-        failed = int(len(df[df[status_col] == "FAILED"]))
+        failed = count_value(df[status_col], "FAILED")
         kpis["success_rate"] = round(safe_divide(len(df) - failed, len(df)) * 100, 2)
         kpis["failed_count"] = failed
 
@@ -49,26 +63,27 @@ async def get_overview():
     # Monthly trend
     monthly_trend = []
     if date_col and amount_col:
-        monthly = df.set_index(date_col).resample("M").agg({amount_col: ["sum", "count"]}).reset_index()
-        monthly.columns = ["month", "value", "volume"]
-        monthly["month"] = monthly["month"].astype(str)
-        monthly_trend = monthly.to_dict(orient="records")
+        months, values, volumes = monthly_sum_count(df, date_col, amount_col)
+        monthly_trend = [
+            {"month": m, "value": float(v), "volume": int(c)}
+            for m, v, c in zip(months.astype(str), values, volumes)
+        ]
 
     # Top states
     top_states = []
     region_col = roles.get("region")
     if region_col and amount_col:
-        top = df.groupby(region_col)[amount_col].sum().nlargest(10).reset_index()
+        top = group_sum(df, region_col, amount_col).nlargest(10).reset_index()
         top.columns = ["state", "value"]
-        top_states = top.to_dict(orient="records")
+        top_states = to_records(top)
 
     # Category breakdown
     categories = []
     cat_col = roles.get("category")
     if cat_col and amount_col:
-        cat = df.groupby(cat_col)[amount_col].sum().reset_index()
+        cat = group_sum(df, cat_col, amount_col).reset_index()
         cat.columns = ["category", "value"]
-        categories = cat.to_dict(orient="records")
+        categories = to_records(cat)
 
     result = {
         "kpis": kpis,
@@ -78,7 +93,6 @@ async def get_overview():
         "top_states": top_states,
         "categories": categories,
         "columns": len(df.columns),
-        "load_time_ms": DATA["load_time_ms"],
+        "load_time_ms": load_time_ms,
     }
-    CACHE["overview"] = result
     return result
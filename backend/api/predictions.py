@@ -2,10 +2,12 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["predictions"])
+from src.predictor import forecast_monthly
+from src.scenario_engine import get_available_scenarios, simulate_scenario
+from main import DATA, ORJSONRoute
+
+router = APIRouter(tags=["predictions"], route_class=ORJSONRoute)
 
 
 class ForecastRequest(BaseModel):
@@ -19,9 +21,6 @@ class ScenarioRequest(BaseModel):
 
 @router.post("/forecast")
 async def forecast(req: ForecastRequest):
-    from main import DATA
-    from src.predictor import forecast_monthly
-
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
@@ -42,9 +41,6 @@ async def forecast(req: ForecastRequest):
 
 @router.get("/scenarios")
 async def get_scenarios():
-    from main import DATA
-    from src.scenario_engine import get_available_scenarios
-
     meta = DATA["metadata"]
     if meta is None:
         return {"error": "No data loaded"}
@@ -54,9 +50,6 @@ async def get_scenarios():
 
 @router.post("/scenario")
 async def run_scenario(req: ScenarioRequest):
-    from main import DATA
-    from src.scenario_engine import simulate_scenario
-
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
@@ -1,23 +1,32 @@
 """Quality API — Data quality checks."""
 from fastapi import APIRouter
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["quality"])
+from src.data_quality import run_quality_checks
+from src.utils import to_records
+from main import DATA, CACHE, single_flight, ORJSONRoute
+
+router = APIRouter(tags=["quality"], route_class=ORJSONRoute)
 
 
 @router.get("/quality")
 async def get_quality():
-    from main import DATA, CACHE
-    if "quality" in CACHE:
-        return CACHE["quality"]
-    from src.data_quality import run_quality_checks
+    cache_key = f"quality:{DATA['version']}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
         return {"error": "No data loaded"}
 
+    result = await single_flight(cache_key, _build_quality, df, meta)
+    CACHE[cache_key] = result
+    return result
+
+
+def _build_quality(df, meta):
+    """Run the quality checks and serialize their tables (blocking pandas work)."""
     results = run_quality_checks(df, meta)
 
     # Serialize DataFrames
@@ -28,23 +37,22 @@ async def get_quality():
         "total_records": int(len(df)),
         "total_columns": int(len(df.columns)),
         "missing_values": {
-            "table": missing["df"].to_dict(orient="records"),
+            "table": to_records(missing["df"]),
             "total": missing["total_missing"],
             "pct": missing["overall_pct"],
         },
         "duplicates": results["duplicates"]["exact_duplicates"],
         "negative_values": {
-            "table": results["negative_values"]["df"].to_dict(orient="records"),
+            "table": to_records(results["negative_values"]["df"]),
             "found": results["negative_values"]["found"],
         },
         "extreme_outliers": {
-            "table": results["extreme_outliers"]["df"].to_dict(orient="records"),
+            "table": to_records(results["extreme_outliers"]["df"]),
             "found": results["extreme_outliers"]["found"],
         },
         "consistency": {
-            "table": results["consistency"]["df"].to_dict(orient="records"),
+            "table": to_records(results["consistency"]["df"]),
             "found": results["consistency"]["found"],
         },
     }
-    CACHE["quality"] = result
     return result
@@ -1,10 +1,13 @@
 """Query API — Natural language query plan + execute."""
 from fastapi import APIRouter
 from pydantic import BaseModel
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["query"])
+from src.query_planner import plan_query
+from src.query_executor import execute_plan
+from src.utils import to_records
+from main import DATA, ORJSONRoute
+
+router = APIRouter(tags=["query"], route_class=ORJSONRoute)
 
 
 class QueryRequest(BaseModel):
@@ -13,10 +16,6 @@ class QueryRequest(BaseModel):
 
 @router.post("/query")
 async def run_query(req: QueryRequest):
-    from main import DATA
-    from src.query_planner import plan_query
-    from src.query_executor import execute_plan
-
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
@@ -25,7 +24,7 @@ async def run_query(req: QueryRequest):
     plan = plan_query(req.query, df, meta)
     result = execute_plan(plan, df, meta)
 
-    result_records = result["result_df"].to_dict(orient="records") if len(result["result_df"]) > 0 else []
+    result_records = to_records(result["result_df"]) if len(result["result_df"]) > 0 else []
 
     return {
         "plan": {
@@ -1,53 +1,73 @@
 """Risk API — Concentration, volatility, composite risk."""
 from fastapi import APIRouter
 from typing import Optional
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-router = APIRouter(tags=["risk"])
+from src.risk_analyzer import (
+    compute_risk_summary, compute_concentration_metrics,
+    compute_volatility_index,
+)
+from src.utils import monthly_sum_count, to_records
+from main import DATA, CACHE, single_flight, ORJSONRoute
+
+router = APIRouter(tags=["risk"], route_class=ORJSONRoute)
 
 
 @router.get("/risk")
 async def get_risk(dimension: Optional[str] = None):
-    from main import DATA, CACHE
-    cache_key = f"risk_{dimension or 'default'}"
-    if cache_key in CACHE:
-        return CACHE[cache_key]
-    from src.risk_analyzer import compute_risk_summary, compute_concentration_metrics, compute_volatility_index
+    cache_key = f"risk:{DATA['version']}:{dimension or 'default'}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
     if df is None:
         return {"error": "No data loaded"}
 
+    if not meta.get("roles", {}).get("amount"):
+        return {"error": "No amount column"}
+
+    risk = await risk_summary(df, meta)
+    result = await single_flight(cache_key, _build_risk, df, meta, dimension, DATA["cat_cols"], risk)
+    CACHE[cache_key] = result
+    return result
+
+
+async def risk_summary(df, meta):
+    """compute_risk_summary for the active dataset, computed once and shared by /overview and /risk."""
+    cache_key = f"risk_summary:{DATA['version']}"
+    risk = CACHE.get(cache_key)
+    if risk is None:
+        risk = await single_flight(cache_key, compute_risk_summary, df, meta)
+        CACHE[cache_key] = risk
+    return risk
+
+
+def _build_risk(df, meta, dimension, cat_cols, risk):
+    """Concentration and volatility for /risk (blocking pandas work), reusing the risk summary's."""
     roles = meta.get("roles", {})
     amount_col = roles.get("amount")
     date_col = roles.get("date")
-    if not amount_col:
-        return {"error": "No amount column"}
 
-    risk = compute_risk_summary(df, meta)
-    dim = dimension or roles.get("region") or list(df.select_dtypes(include=["object"]).columns)[0]
+    dim = dimension or roles.get("region") or cat_cols[0]
 
-    # Concentration
-    conc = compute_concentration_metrics(df, dim, amount_col)
-    conc_table = conc["shares_df"].to_dict(orient="records") if "shares_df" in conc else []
+    # Concentration (copies, so popping below leaves the cached summary intact)
+    if dim == roles.get("region") and "concentration" in risk:
+        conc = dict(risk["concentration"])
+    else:
+        conc = compute_concentration_metrics(df, dim, amount_col)
+    conc_table = to_records(conc["shares_df"]) if "shares_df" in conc else []
     conc.pop("shares_df", None)
 
     # Volatility
     volatility = {}
     if date_col:
-        vol = compute_volatility_index(df, date_col, amount_col)
+        vol = dict(risk["volatility"]) if "volatility" in risk else compute_volatility_index(df, date_col, amount_col)
         vol.pop("monthly_series", None)
         volatility = vol
 
-        monthly = df.set_index(date_col).resample("M")[amount_col].sum().reset_index()
-        monthly.columns = ["month", "value"]
-        monthly["month"] = monthly["month"].astype(str)
-        volatility["monthly_data"] = monthly.to_dict(orient="records")
-
-    # Available dimensions
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+        months, values, _ = monthly_sum_count(df, date_col, amount_col)
+        volatility["monthly_data"] = [{"month": m, "value": float(v)} for m, v in zip(months.astype(str), values)]
 
     result = {
         "risk_index": risk.get("risk_index", 0),
@@ -57,5 +77,4 @@ async def get_risk(dimension: Optional[str] = None):
         "current_dimension": dim,
         "available_dimensions": cat_cols,
     }
-    CACHE[cache_key] = result
     return result
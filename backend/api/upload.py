@@ -1,25 +1,33 @@
 """Upload API — CSV upload, reset, schema, preview, export."""
 import os
 import io
+import csv
 import time
+import codecs
 import tempfile
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import StreamingResponse
-import sys
+import numpy as np
+import pandas as pd
+from src.data_profiler import load_and_profile, get_descriptive_stats, read_csv
+from src.utils import to_records
+from main import DATA, CACHE, logger, set_dataset, ORJSONRoute
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
-router = APIRouter(tags=["upload"])
+router = APIRouter(tags=["upload"], route_class=ORJSONRoute)
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+EXPORT_CHUNK_ROWS = 50_000
 
 
 @router.post("/upload")
 async def upload_csv(file: UploadFile = File(...)):
     """Upload a CSV file and replace the active dataset."""
-    from main import DATA, logger, CACHE
-    from src.data_profiler import load_and_profile, get_column_summary_df
-    import pandas as pd
 
     # Validate file type
     if not file.filename.endswith(('.csv', '.tsv', '.txt')):
@@ -32,22 +40,30 @@ async def upload_csv(file: UploadFile = File(...)):
     if len(contents) < 10:
         raise HTTPException(400, "File appears to be empty")
 
-    # Try multiple delimiters and encodings
-    df = None
+    # Sniff the dialect and parse once; fall back to trying delimiters and encodings
+    df = _parse_sniffed(contents)
     errors = []
-    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-        for sep in [',', '\t', ';', '|']:
-            try:
-                text = contents.decode(encoding)
-                df = pd.read_csv(io.StringIO(text), sep=sep)
-                if len(df.columns) >= 2 and len(df) >= 1:
+    if df is None:
+        # Spill to disk once so each attempt lets the C parser decode bytes itself,
+        # instead of materializing a decoded Python str per encoding
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as tmp:
+            tmp.write(contents)
+            tmp_path = tmp.name
+        try:
+            for encoding in ['utf-8', 'latin-1', 'cp1252']:
+                for sep in [',', '\t', ';', '|']:
+                    try:
+                        df = pd.read_csv(tmp_path, sep=sep, encoding=encoding, engine='c', low_memory=False)
+                        if len(df.columns) >= 2 and len(df) >= 1:
+                            break
+                        df = None
+                    except Exception as e:
+                        errors.append(str(e))
+                        df = None
+                if df is not None:
                     break
-                df = None
-            except Exception as e:
-                errors.append(str(e))
-                df = None
-        if df is not None:
-            break
+        finally:
+            os.remove(tmp_path)
 
     if df is None:
         raise HTTPException(400, f"Could not parse CSV. Make sure it is a valid tabular file. Errors: {'; '.join(errors[:3])}")
@@ -62,42 +78,62 @@ async def upload_csv(file: UploadFile = File(...)):
     load_time = round((time.time() - t0) * 1000, 0)
 
     # Replace global state
-    DATA["df"] = df
-    DATA["metadata"] = metadata
-    DATA["load_time_ms"] = load_time
-    DATA["source"] = file.filename
+    set_dataset(df, metadata, load_time, file.filename)
 
     logger.info(f"Uploaded: {file.filename} — {len(df):,} rows, {len(df.columns)} cols in {load_time}ms")
     CACHE.clear()
 
-    # Build response
-    col_summary = get_column_summary_df(metadata).to_dict(orient="records")
-    roles = metadata.get("roles", {})
-
+    # Profile-derived fields are served (and cached) by /schema; keep this response small
     return {
         "status": "ok",
         "filename": file.filename,
         "rows": int(len(df)),
         "columns": int(len(df.columns)),
-        "column_names": df.columns.tolist(),
         "load_time_ms": load_time,
-        "numeric_columns": metadata.get("numeric_columns", []),
-        "categorical_columns": metadata.get("categorical_columns", []),
-        "datetime_columns": metadata.get("datetime_columns", []),
-        "id_columns": metadata.get("id_columns", []),
-        "roles": roles,
-        "duplicate_rows": metadata.get("duplicate_rows", 0),
-        "column_summary": col_summary,
-        "date_range": metadata.get("date_range"),
-        "correlation_matrix": metadata.get("correlation_matrix"),
+        "version": DATA["version"],
     }
 
 
+def _parse_sniffed(contents):
+    """
+    Parse the upload in a single pass: encoding from the BOM (else UTF-8), delimiter from
+    csv.Sniffer on the first 64KB. Returns None when that guess does not give a usable table.
+    """
+    encoding = "utf-8-sig" if contents.startswith(codecs.BOM_UTF8) else "utf-8"
+    # pyarrow hands back undecodable text columns as raw bytes, so check the encoding first
+    if not _decodes(contents, encoding):
+        return None
+    head = contents[:65536].decode(encoding, errors="ignore")
+    try:
+        sep = csv.Sniffer().sniff(head, delimiters=",\t;|").delimiter
+    except csv.Error:
+        sep = ","
+    try:
+        df = read_csv(io.BytesIO(contents), sep=sep, encoding=encoding)
+    except Exception:
+        return None
+    return df if len(df.columns) >= 2 and len(df) >= 1 else None
+
+
+def _decodes(contents, encoding, chunk_size=1 << 20):
+    """
+    True if contents is valid in encoding. Decodes 1MB slices through an incremental
+    decoder, so validating a large upload never holds a second full copy as str.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    view = memoryview(contents)
+    try:
+        for start in range(0, len(view), chunk_size):
+            decoder.decode(view[start:start + chunk_size])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
 @router.post("/reset")
 async def reset_dataset():
     """Reset to the default dataset from data/ directory."""
-    from main import DATA, logger, CACHE
-    from src.data_profiler import load_and_profile
 
     data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
     csv_files = [f for f in os.listdir(data_dir) if f.endswith(".csv")] if os.path.exists(data_dir) else []
@@ -110,10 +146,7 @@ async def reset_dataset():
     df, metadata = load_and_profile(filepath)
     load_time = round((time.time() - t0) * 1000, 0)
 
-    DATA["df"] = df
-    DATA["metadata"] = metadata
-    DATA["load_time_ms"] = load_time
-    DATA["source"] = csv_files[0]
+    set_dataset(df, metadata, load_time, csv_files[0])
 
     logger.info(f"Reset to default: {csv_files[0]} — {len(df):,} rows in {load_time}ms")
     CACHE.clear()
@@ -124,14 +157,17 @@ async def reset_dataset():
         "rows": int(len(df)),
         "columns": int(len(df.columns)),
         "load_time_ms": load_time,
+        "version": DATA["version"],
     }
 
 
 @router.get("/schema")
 async def get_schema():
     """Return full schema metadata for the current dataset."""
-    from main import DATA
-    from src.data_profiler import get_descriptive_stats
+    cache_key = f"schema:{DATA['version']}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     df = DATA["df"]
     meta = DATA["metadata"]
@@ -140,11 +176,11 @@ async def get_schema():
 
     stats = get_descriptive_stats(df, meta)
 
-    return {
+    result = {
         "source": DATA.get("source", "unknown"),
         "rows": int(len(df)),
         "columns": int(len(df.columns)),
-        "column_names": df.columns.tolist(),
+        "column_names": DATA["columns"],
         "column_details": meta.get("column_details", {}),
         "numeric_columns": meta.get("numeric_columns", []),
         "categorical_columns": meta.get("categorical_columns", []),
@@ -156,49 +192,127 @@ async def get_schema():
         "correlation_matrix": meta.get("correlation_matrix"),
         "summary_stats": stats.to_dict() if not stats.empty else {},
     }
+    CACHE[cache_key] = result
+    return result
 
 
 @router.get("/preview")
 async def preview_data(limit: int = 50):
     """Return first N rows of the current dataset."""
-    from main import DATA
 
     df = DATA["df"]
     if df is None:
         return {"error": "No data loaded"}
 
     limit = min(limit, 200)
+    cache_key = f"preview:{DATA['version']}:{limit}"
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     preview = df.head(limit)
 
-    # Convert datetime columns to strings for JSON serialization
-    for col in preview.select_dtypes(include=["datetime64"]).columns:
-        preview[col] = preview[col].astype(str)
+    # Convert datetime columns (listed once at load time) to strings for JSON serialization
+    date_cols = DATA["datetime_cols"]
+    if date_cols:
+        preview = preview.copy()
+        for col in date_cols:
+            preview[col] = _datetime_strings(preview[col])
 
-    return {
-        "columns": preview.columns.tolist(),
-        "rows": preview.to_dict(orient="records"),
+    result = {
+        "columns": DATA["columns"],
+        "rows": to_records(preview),
         "total_rows": int(len(df)),
         "showing": int(len(preview)),
     }
+    CACHE[cache_key] = result
+    return result
 
 
 @router.get("/export")
 async def export_data(format: str = "csv"):
     """Export current dataset as CSV download."""
-    from main import DATA
 
     df = DATA["df"]
     if df is None:
         raise HTTPException(404, "No data loaded")
 
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    buf.seek(0)
-
     filename = DATA.get("source", "export") .replace(".csv", "") + "_export.csv"
 
     return StreamingResponse(
-        iter([buf.getvalue()]),
+        _csv_chunks(df, DATA["datetime_cols"]),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+def _datetime_strings(series):
+    """
+    Vectorized equivalent of series.astype(str) for datetime64 columns, via
+    np.datetime_as_string. Falls back to pandas for tz-aware or sub-second values.
+    """
+    values = series.to_numpy()
+    if values.dtype.kind != "M":
+        return series.astype(str)
+    valid = values[~np.isnat(values)]
+    if (valid == valid.astype("datetime64[D]")).all():
+        unit = "D"  # pandas drops the time part when every value is midnight
+    elif (valid == valid.astype("datetime64[s]")).all():
+        unit = "s"
+    else:
+        return series.astype(str)
+    strings = np.datetime_as_string(values, unit=unit)
+    if unit == "s":
+        strings = np.where(np.isnat(values), "NaT", np.char.replace(strings, "T", " "))
+    return pd.Series(strings, index=series.index, dtype=object)
+
+
+def _csv_chunks(df, datetime_cols=()):
+    """
+    Yield the DataFrame as CSV, EXPORT_CHUNK_ROWS rows at a time (header first), with
+    the same bytes as df.to_csv(index=False). Chunks are written by pyarrow's C++ CSV
+    writer when it is installed and can reproduce them; others fall back to pandas.
+    """
+    for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+        if pa is not None:
+            try:
+                rendered = _arrow_csv(chunk, datetime_cols, header=start == 0)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                rendered = None
+            if rendered is not None:
+                yield rendered
+                continue
+        buf = io.StringIO()
+        chunk.to_csv(buf, index=False, header=start == 0)
+        yield buf.getvalue()
+
+
+def _arrow_csv(chunk, datetime_cols, header):
+    """
+    Render one chunk to CSV bytes with pyarrow.csv.write_csv, or None when the output
+    would differ from to_csv: floats and booleans format differently, and single-column
+    rows are quoted by pandas. Values that need quoting make write_csv raise ArrowInvalid
+    (quoting_style="none"), which the caller also treats as a fallback.
+    """
+    if len(chunk.columns) < 2:
+        return None
+    if datetime_cols:
+        # to_csv writes NaT as an empty field
+        chunk = chunk.assign(**{col: _datetime_strings(chunk[col]).mask(chunk[col].isna()) for col in datetime_cols})
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if not all(_csv_text_type(field.type) for field in table.schema):
+        return None
+    sink = io.BytesIO()
+    if header:
+        # pyarrow quotes header names regardless of quoting_style
+        sink.write(chunk.head(0).to_csv(index=False).encode())
+    pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=False, quoting_style="none"))
+    return sink.getvalue()
+
+
+def _csv_text_type(arrow_type):
+    """True for Arrow types whose CSV rendering matches pandas: strings, integers, nulls."""
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    return (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+            or pa.types.is_integer(arrow_type) or pa.types.is_null(arrow_type))
@@ -5,31 +5,158 @@ Wraps existing analysis modules into a clean REST API.
 import os
 import sys
 import time
+import asyncio
+import hashlib
+import functools
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
 
 # Ensure src is importable
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.data_profiler import load_and_profile
+from src.data_profiler import load_and_profile_cached
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, workers may each profile once
+    fcntl = None
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 logger = logging.getLogger("upi-platform")
 
 # Global state
-DATA = {"df": None, "metadata": None, "load_time_ms": 0, "source": ""}
+DATA = {
+    "df": None, "metadata": None, "load_time_ms": 0, "source": "", "version": 0,
+    "columns": [], "datetime_cols": [], "cat_cols": [],
+}
+
+
+def set_dataset(df, metadata, load_time_ms, source):
+    """
+    Make df the active dataset. Column lists that endpoints need are derived here once,
+    rather than re-scanning dtypes on every request. Every load bumps DATA["version"],
+    which keys the result caches, so nothing computed for an earlier load is served again.
+    """
+    DATA.update(
+        version=DATA["version"] + 1,
+        df=df,
+        metadata=metadata,
+        load_time_ms=load_time_ms,
+        source=source,
+        columns=df.columns.tolist(),
+        datetime_cols=df.select_dtypes(include=["datetime64"]).columns.tolist(),
+        cat_cols=df.select_dtypes(include=["object", "category"]).columns.tolist(),
+    )
+
+
+class LRUCache:
+    """Thread-safe dict-like cache that evicts the least recently used entry."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
 
 # In-memory cache for computed API results (cleared on data reload)
-CACHE = {}
+CACHE = LRUCache(maxsize=128)
+
+# Worker threads for blocking pandas work, installed as the loop's default executor
+# so asyncio.to_thread() calls share it
+EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="pandas")
+
+# Computations currently running, keyed like CACHE (see single_flight)
+INFLIGHT = {}
+
+
+async def single_flight(key, fn, *args):
+    """
+    Run fn(*args) in a worker thread, sharing one execution between concurrent callers.
+    A second request for the same key awaits the first one's result instead of
+    starting a duplicate pandas job.
+    """
+    pending = INFLIGHT.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    INFLIGHT[key] = future
+    try:
+        result = await asyncio.to_thread(fn, *args)
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # Mark as retrieved when nobody else is waiting
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del INFLIGHT[key]
+
+
+def load_shared_dataset(filepath):
+    """
+    Load the startup dataset through the Parquet snapshot in data/.cache/.
+    With `uvicorn --workers N` the first worker to take the lock parses and profiles
+    the CSV; the others wait, then read the snapshot instead of re-parsing it.
+    """
+    if fcntl is None:
+        return load_and_profile_cached(filepath)
+    cache_dir = os.path.join(os.path.dirname(filepath), ".cache")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        lock = open(os.path.join(cache_dir, ".lock"), "w")
+    except OSError:
+        return load_and_profile_cached(filepath, cache_dir)
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return load_and_profile_cached(filepath, cache_dir)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Auto-load dataset on startup."""
+    asyncio.get_running_loop().set_default_executor(EXECUTOR)
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
     csv_files = [f for f in os.listdir(data_dir) if f.endswith(".csv")] if os.path.exists(data_dir) else []
 
@@ -37,11 +164,8 @@ async def lifespan(app: FastAPI):
         filepath = os.path.join(data_dir, csv_files[0])
         logger.info(f"Loading dataset: {filepath}")
         t0 = time.time()
-        df, metadata = load_and_profile(filepath)
-        DATA["df"] = df
-        DATA["metadata"] = metadata
-        DATA["load_time_ms"] = round((time.time() - t0) * 1000, 0)
-        DATA["source"] = csv_files[0]
+        df, metadata = await asyncio.to_thread(load_shared_dataset, filepath)
+        set_dataset(df, metadata, round((time.time() - t0) * 1000, 0), csv_files[0])
         logger.info(f"Loaded {len(df):,} rows in {DATA['load_time_ms']}ms")
 
         # Pre-warm cache for instant first page loads
@@ -52,12 +176,14 @@ async def lifespan(app: FastAPI):
             from api.anomalies import detect_anomalies, AnomalyRequest
             from api.risk import get_risk
             from api.quality import get_quality
-            import asyncio
-            await get_overview()
-            await get_insights()
-            await detect_anomalies(AnomalyRequest(method="all"))
-            await get_risk()
-            await get_quality()
+            # Each endpoint runs its pandas work in a worker thread, so these overlap
+            await asyncio.gather(
+                get_overview(),
+                get_insights(),
+                detect_anomalies(AnomalyRequest(method="all")),
+                get_risk(),
+                get_quality(),
+            )
             logger.info(f"Cache pre-warmed: {len(CACHE)} entries")
         except Exception as e:
             logger.warning(f"Cache pre-warm partial failure: {e}")
@@ -68,11 +194,45 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down")
 
 
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson: NumPy scalars/arrays are serialized directly and NaN
+    is written as null. Types orjson doesn't know (e.g. pandas Timestamps) go through
+    FastAPI's jsonable_encoder.
+    """
+
+    def render(self, content):
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+class ORJSONRoute(APIRoute):
+    """
+    Route that hands an async endpoint's return value straight to ORJSONResponse.
+    FastAPI otherwise runs jsonable_encoder over every plain dict before render(), which
+    walks the whole payload in Python and rejects NumPy scalars such as np.float32.
+    The endpoint function itself is unchanged, so /dashboard can still call the others.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def endpoint(*args, **kw):
+                result = await original(*args, **kw)
+                return result if isinstance(result, Response) else ORJSONResponse(result)
+
+        super().__init__(path, endpoint, **kwargs)
+
+
 app = FastAPI(
     title="UPI Intelligence API",
     description="AI-powered analytics engine for UPI transaction data",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS — allow React dev server and Vercel domains
@@ -84,6 +244,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# GET endpoints whose response depends only on the loaded dataset and query params
+ETAG_PATHS = {
+    "/api/overview", "/api/risk", "/api/quality", "/api/schema", "/api/preview", "/api/insights", "/api/dashboard",
+}
+
+
+@app.middleware("http")
+async def dataset_etag(request: Request, call_next):
+    """
+    Tag dataset-derived GET responses with an ETag built from the dataset version,
+    path and query, and answer a matching If-None-Match with 304 before any pandas work.
+    """
+    if request.method != "GET" or request.url.path not in ETAG_PATHS or DATA["df"] is None:
+        return await call_next(request)
+
+    token = f"{DATA['version']}|{request.url.path}|{request.url.query}"
+    etag = '"' + hashlib.blake2b(token.encode(), digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    client_tags = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+
 # Import and register routers
 from api.overview import router as overview_router
 from api.query import router as query_router
@@ -93,6 +281,7 @@ from api.risk import router as risk_router
 from api.compare import router as compare_router
 from api.quality import router as quality_router
 from api.upload import router as upload_router
+from api.dashboard import router as dashboard_router
 
 
 app.include_router(overview_router, prefix="/api")
@@ -103,6 +292,7 @@ app.include_router(risk_router, prefix="/api")
 app.include_router(compare_router, prefix="/api")
 app.include_router(quality_router, prefix="/api")
 app.include_router(upload_router, prefix="/api")
+app.include_router(dashboard_router, prefix="/api")
 
 
 
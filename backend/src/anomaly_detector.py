@@ -3,39 +3,59 @@ Anomaly Detection Module — IQR, Z-score, rolling deviation, and spike detectio
 """
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, get_numeric_columns
+from src.utils import format_currency, get_numeric_columns, group_sum
 
 
-def detect_iqr_anomalies(df, column, multiplier=1.5):
-    """Detect anomalies using the IQR method."""
-    Q1 = df[column].quantile(0.25)
-    Q3 = df[column].quantile(0.75)
+def _quantile(df, column, pct, stats):
+    """pct-th percentile of a column, read from profiled amount_stats when available."""
+    if stats and stats.get('column') == column and str(pct) in stats['percentiles']:
+        return stats['percentiles'][str(pct)]
+    return df[column].quantile(pct / 100)
+
+
+def _column_values(df, column):
+    """Return a column as a float ndarray (NaN for missing) for threshold masks."""
+    return df[column].to_numpy(dtype=float, na_value=np.nan)
+
+
+def detect_iqr_anomalies(df, column, multiplier=1.5, stats=None, limit=None):
+    """
+    Detect anomalies using the IQR method. `stats` is metadata['amount_stats'], if profiled.
+    With `limit`, only the first `limit` anomalous rows are materialized; stats['count'] has the total.
+    """
+    Q1 = _quantile(df, column, 25, stats)
+    Q3 = _quantile(df, column, 75, stats)
     IQR = Q3 - Q1
     lower = Q1 - multiplier * IQR
     upper = Q3 + multiplier * IQR
 
-    anomalies = df[(df[column] < lower) | (df[column] > upper)].copy()
-    anomalies['anomaly_reason'] = anomalies[column].apply(
-        lambda x: f"Below IQR lower bound ({lower:.0f})" if x < lower else f"Above IQR upper bound ({upper:.0f})"
+    values = _column_values(df, column)
+    below = values < lower
+    idx = np.flatnonzero(below | (values > upper))
+    shown = idx[:limit]
+    anomalies = df.take(shown)
+    anomalies['anomaly_reason'] = np.where(
+        below[shown], f"Below IQR lower bound ({lower:.0f})", f"Above IQR upper bound ({upper:.0f})"
     )
-    return anomalies, {'Q1': Q1, 'Q3': Q3, 'IQR': IQR, 'lower': lower, 'upper': upper}
+    return anomalies, {'Q1': Q1, 'Q3': Q3, 'IQR': IQR, 'lower': lower, 'upper': upper, 'count': int(idx.size)}
 
 
-def detect_zscore_anomalies(df, column, threshold=3.0):
-    """Detect anomalies using Z-score method."""
-    mean = df[column].mean()
-    std = df[column].std()
+def detect_zscore_anomalies(df, column, threshold=3.0, stats=None, limit=None):
+    """Detect anomalies using Z-score method. `stats` and `limit` as in detect_iqr_anomalies."""
+    if stats and stats.get('column') == column:
+        mean, std = stats['mean'], stats['std']
+    else:
+        mean = df[column].mean()
+        std = df[column].std()
     if std == 0:
-        return pd.DataFrame(), {'mean': mean, 'std': 0, 'threshold': threshold}
+        return pd.DataFrame(), {'mean': mean, 'std': 0, 'threshold': threshold, 'count': 0}
 
-    df_copy = df.copy()
-    df_copy['_zscore'] = (df_copy[column] - mean) / std
-    anomalies = df_copy[df_copy['_zscore'].abs() > threshold].copy()
-    anomalies['anomaly_reason'] = anomalies['_zscore'].apply(
-        lambda z: f"Z-score: {z:.2f} (threshold: ±{threshold})"
-    )
-    anomalies = anomalies.drop(columns=['_zscore'])
-    return anomalies, {'mean': mean, 'std': std, 'threshold': threshold}
+    zscores = (_column_values(df, column) - mean) / std
+    idx = np.flatnonzero(np.abs(zscores) > threshold)
+    shown = idx[:limit]
+    anomalies = df.take(shown)
+    anomalies['anomaly_reason'] = [f"Z-score: {z:.2f} (threshold: ±{threshold})" for z in zscores[shown]]
+    return anomalies, {'mean': mean, 'std': std, 'threshold': threshold, 'count': int(idx.size)}
 
 
 def detect_rolling_anomalies(df, date_col, value_col, window=7, threshold=2.0):
@@ -58,9 +78,8 @@ def detect_rolling_anomalies(df, date_col, value_col, window=7, threshold=2.0):
 
 def detect_growth_spikes(df, date_col, value_col, growth_threshold=50.0):
     """Detect sudden growth spikes (month-over-month)."""
-    monthly = df.set_index(date_col).resample('M')[value_col].sum().reset_index()
+    monthly = df.set_index(date_col).resample('ME')[value_col].sum().reset_index()
     monthly.columns = ['Month', 'Value']
-    monthly = monthly.sort_values('Month')
     monthly['Growth %'] = monthly['Value'].pct_change() * 100
 
     spikes = monthly[monthly['Growth %'].abs() > growth_threshold].copy()
@@ -72,7 +91,7 @@ def detect_growth_spikes(df, date_col, value_col, growth_threshold=50.0):
 
 def detect_concentration_anomaly(df, group_col, value_col, dominance_threshold=30.0):
     """Flag if any single group dominates excessively."""
-    grouped = df.groupby(group_col)[value_col].sum()
+    grouped = group_sum(df, group_col, value_col)
     total = grouped.sum()
     shares = (grouped / total * 100).sort_values(ascending=False)
 
@@ -87,50 +106,56 @@ def detect_concentration_anomaly(df, group_col, value_col, dominance_threshold=3
     return pd.DataFrame(results) if results else pd.DataFrame()
 
 
-def detect_percentile_anomalies(df, column, lower_pct=1, upper_pct=99):
-    """Detect anomalies using percentile thresholds."""
-    lower_bound = df[column].quantile(lower_pct / 100)
-    upper_bound = df[column].quantile(upper_pct / 100)
+def detect_percentile_anomalies(df, column, lower_pct=1, upper_pct=99, stats=None, limit=None):
+    """Detect anomalies using percentile thresholds. `stats` and `limit` as in detect_iqr_anomalies."""
+    lower_bound = _quantile(df, column, lower_pct, stats)
+    upper_bound = _quantile(df, column, upper_pct, stats)
 
-    anomalies = df[(df[column] < lower_bound) | (df[column] > upper_bound)].copy()
-    anomalies['anomaly_reason'] = anomalies[column].apply(
-        lambda x: f"Below {lower_pct}th percentile ({lower_bound:.0f})" if x < lower_bound
-        else f"Above {upper_pct}th percentile ({upper_bound:.0f})"
+    values = _column_values(df, column)
+    below = values < lower_bound
+    idx = np.flatnonzero(below | (values > upper_bound))
+    shown = idx[:limit]
+    anomalies = df.take(shown)
+    anomalies['anomaly_reason'] = np.where(
+        below[shown], f"Below {lower_pct}th percentile ({lower_bound:.0f})",
+        f"Above {upper_pct}th percentile ({upper_bound:.0f})"
     )
     return anomalies, {'lower_pct': lower_pct, 'upper_pct': upper_pct,
-                       'lower_bound': lower_bound, 'upper_bound': upper_bound}
+                       'lower_bound': lower_bound, 'upper_bound': upper_bound, 'count': int(idx.size)}
 
 
-def run_full_anomaly_detection(df, metadata, method='all'):
+def run_full_anomaly_detection(df, metadata, method='all', limit=None):
     """
     Run all anomaly detection methods.
-    Returns dict of method → (anomaly_df, stats).
+    Returns dict of method → (anomaly_df, stats). `limit` caps the rows materialized by
+    the row-level (IQR, Z-score, percentile) detectors; 'count' is always the full total.
     """
     results = {}
     roles = metadata.get('roles', {})
     amount_col = roles.get('amount')
     date_col = roles.get('date')
     region_col = roles.get('region')
+    amount_stats = metadata.get('amount_stats')
 
     if not amount_col:
         return results
 
     if method in ('all', 'iqr'):
-        anomalies, stats = detect_iqr_anomalies(df, amount_col)
+        anomalies, stats = detect_iqr_anomalies(df, amount_col, stats=amount_stats, limit=limit)
         results['IQR Method'] = {
             'anomalies': anomalies,
             'stats': stats,
-            'count': len(anomalies),
-            'description': f"Found {len(anomalies)} anomalies using IQR (1.5x). Bounds: [{stats['lower']:.0f}, {stats['upper']:.0f}]"
+            'count': stats['count'],
+            'description': f"Found {stats['count']} anomalies using IQR (1.5x). Bounds: [{stats['lower']:.0f}, {stats['upper']:.0f}]"
         }
 
     if method in ('all', 'zscore'):
-        anomalies, stats = detect_zscore_anomalies(df, amount_col)
+        anomalies, stats = detect_zscore_anomalies(df, amount_col, stats=amount_stats, limit=limit)
         results['Z-Score Method'] = {
             'anomalies': anomalies,
             'stats': stats,
-            'count': len(anomalies),
-            'description': f"Found {len(anomalies)} anomalies with |Z| > {stats['threshold']}. Mean: {stats['mean']:.0f}, Std: {stats['std']:.0f}"
+            'count': stats['count'],
+            'description': f"Found {stats['count']} anomalies with |Z| > {stats['threshold']}. Mean: {stats['mean']:.0f}, Std: {stats['std']:.0f}"
         }
 
     if method in ('all', 'rolling') and date_col:
@@ -160,12 +185,12 @@ def run_full_anomaly_detection(df, metadata, method='all'):
         }
 
     if method in ('all', 'percentile'):
-        anomalies, stats = detect_percentile_anomalies(df, amount_col)
+        anomalies, stats = detect_percentile_anomalies(df, amount_col, stats=amount_stats, limit=limit)
         results['Percentile Threshold'] = {
             'anomalies': anomalies,
             'stats': stats,
-            'count': len(anomalies),
-            'description': f"Found {len(anomalies)} anomalies outside [{stats['lower_pct']}th, {stats['upper_pct']}th] percentile. Bounds: [{stats['lower_bound']:.0f}, {stats['upper_bound']:.0f}]"
+            'count': stats['count'],
+            'description': f"Found {stats['count']} anomalies outside [{stats['lower_pct']}th, {stats['upper_pct']}th] percentile. Bounds: [{stats['lower_bound']:.0f}, {stats['upper_bound']:.0f}]"
         }
 
     return results
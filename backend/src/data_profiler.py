@@ -1,9 +1,44 @@
 """
 Data Profiling Engine — Auto-detects schema, computes statistics, and generates metadata.
 """
+import os
+import re
+import json
+import hashlib
 import pandas as pd
 import numpy as np
-from src.utils import get_numeric_columns, get_categorical_columns, get_datetime_columns, detect_column_role
+from src.utils import get_numeric_columns, get_categorical_columns, get_datetime_columns, detect_column_role, is_text_column, fast_median
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Bump whenever load_and_profile's output changes (dtype rules, metadata keys), so
+# Parquet snapshots written by older code are re-profiled instead of served
+PROFILE_VERSION = 1
+
+
+def read_csv(source, **kwargs):
+    """
+    Read a CSV with the multi-threaded pyarrow parser when it is installed.
+    Falls back to the default pandas parser if pyarrow is missing or rejects the file.
+    Columns keep regular NumPy dtypes so downstream dtype checks are unchanged.
+    """
+    if CSV_ENGINE == 'pyarrow':
+        try:
+            df = pd.read_csv(source, engine='pyarrow', **kwargs)
+        except Exception:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+        else:
+            # pyarrow infers timestamps as datetime64[s]; the C parser path yields [ns]
+            for col in df.columns:
+                if pd.api.types.is_datetime64_any_dtype(df[col]) and df[col].dt.unit != 'ns':
+                    df[col] = df[col].dt.as_unit('ns')
+            return df
+    return pd.read_csv(source, **kwargs)
 
 
 def load_and_profile(filepath_or_df):
@@ -13,7 +48,7 @@ def load_and_profile(filepath_or_df):
     Returns (df, metadata).
     """
     if isinstance(filepath_or_df, str):
-        df = pd.read_csv(filepath_or_df)
+        df = read_csv(filepath_or_df)
     else:
         df = filepath_or_df.copy()
 
@@ -28,10 +63,110 @@ def load_and_profile(filepath_or_df):
             except (ValueError, TypeError):
                 pass
 
+    # --- Store repeated strings as categoricals (int codes: cheaper ==, groupby, memory) ---
+    n_rows = len(df)
+    for col in df.select_dtypes(include='object').columns:
+        if n_rows and df[col].nunique(dropna=False) / n_rows < 0.5:
+            df[col] = df[col].astype('category')
+
+    _downcast_numeric(df)
+
     metadata = generate_metadata(df)
+    metadata['fingerprint'] = _content_fingerprint(df)
+    return df, metadata
+
+
+def _content_fingerprint(df):
+    """
+    Hash of the profiled frame's column names and every row. Kept in metadata so caches
+    can recognize the dataset across copies (st.cache_data returns a new DataFrame per call).
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update("\x1f".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _downcast_numeric(df):
+    """
+    Narrow integer columns in place where it is lossless: 0/1 flag columns (fraud,
+    weekend) -> int8, other int64 -> int32 when the range fits. pandas widens these
+    back to int64 when summing. Floats stay float64: pandas reduces float32 in
+    float32, which would drift totals and leak np.float32 scalars into API responses.
+    """
+    for col in df.select_dtypes(include=[np.int64]).columns:
+        values = df[col].to_numpy()
+        if not len(values):
+            continue
+        if 0 <= values.min() and values.max() <= 1:
+            df[col] = values.astype(np.int8)
+        elif np.iinfo(np.int32).min <= values.min() and values.max() <= np.iinfo(np.int32).max:
+            df[col] = values.astype(np.int32)
+
+
+def load_and_profile_cached(filepath, cache_dir=None):
+    """
+    Load and profile a CSV, reusing a Parquet snapshot of the profiled frame.
+    Snapshots live in data/.cache/ and are keyed by file name, PROFILE_VERSION, size and
+    mtime, so an edited file or a profiler change re-profiles automatically; older
+    snapshots of the same file are removed once the new one is written.
+    Returns (df, metadata) like load_and_profile.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(filepath), '.cache')
+    name = os.path.basename(filepath)
+    stat = os.stat(filepath)
+    key = f"{name}.v{PROFILE_VERSION}.{stat.st_size}.{int(stat.st_mtime)}"
+    parquet_path = os.path.join(cache_dir, key + '.parquet')
+    meta_path = os.path.join(cache_dir, key + '.json')
+
+    if os.path.exists(parquet_path) and os.path.exists(meta_path):
+        try:
+            df = pd.read_parquet(parquet_path, engine='pyarrow')
+            with open(meta_path, encoding='utf-8') as f:
+                return df, json.load(f)
+        except Exception:
+            pass  # Corrupt or unreadable snapshot — fall through and rebuild it
+
+    df, metadata = load_and_profile(filepath)
+    # Write to temp names and rename into place, so another process (e.g. a second
+    # uvicorn worker) never reads a half-written snapshot
+    tmp_suffix = f'.{os.getpid()}.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_parquet(parquet_path + tmp_suffix, engine='pyarrow', compression='zstd', index=False)
+        with open(meta_path + tmp_suffix, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, default=_json_default)
+        os.replace(meta_path + tmp_suffix, meta_path)
+        os.replace(parquet_path + tmp_suffix, parquet_path)
+    except Exception:
+        # Caching is best-effort (no pyarrow, read-only disk, ...). Only our temp files
+        # are removed: the final paths may hold a snapshot another worker just published.
+        for path in (parquet_path + tmp_suffix, meta_path + tmp_suffix):
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        _remove_stale_snapshots(cache_dir, name, key)
     return df, metadata
 
 
+def _remove_stale_snapshots(cache_dir, name, key):
+    """Delete snapshots of `name` other than `key` (older mtimes, sizes or profiler versions)."""
+    pattern = re.compile(rf'{re.escape(name)}\.(?:v\d+\.\d+\.)?\d+\.(?:parquet|json)')
+    for entry in os.listdir(cache_dir):
+        if pattern.fullmatch(entry) and not entry.startswith(key + '.'):
+            try:
+                os.remove(os.path.join(cache_dir, entry))
+            except OSError:
+                pass  # Already removed by another worker
+
+
+def _json_default(value):
+    """Convert NumPy scalars left in metadata to native Python types."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
 def generate_metadata(df):
     """Generate comprehensive metadata object from a DataFrame."""
     meta = {}
@@ -58,7 +193,7 @@ def generate_metadata(df):
             'missing_pct': round(df[col].isna().mean() * 100, 2),
             'unique': int(df[col].nunique()),
         }
-        if df[col].dtype in ['int64', 'float64']:
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
             info['mean'] = round(float(df[col].mean()), 2) if not df[col].isna().all() else None
             info['median'] = round(float(df[col].median()), 2) if not df[col].isna().all() else None
             info['std'] = round(float(df[col].std()), 2) if not df[col].isna().all() else None
@@ -66,7 +201,7 @@ def generate_metadata(df):
             info['max'] = float(df[col].max()) if not df[col].isna().all() else None
             info['q25'] = round(float(df[col].quantile(0.25)), 2) if not df[col].isna().all() else None
             info['q75'] = round(float(df[col].quantile(0.75)), 2) if not df[col].isna().all() else None
-        elif df[col].dtype == 'object':
+        elif is_text_column(df[col]):
             info['top_values'] = df[col].value_counts().head(10).to_dict()
         elif pd.api.types.is_datetime64_any_dtype(df[col]):
             info['min_date'] = str(df[col].min())
@@ -75,6 +210,7 @@ def generate_metadata(df):
 
         col_details[col] = info
     meta['column_details'] = col_details
+    meta['missing_cells'] = sum(info['missing'] for info in col_details.values())
 
     # Duplicate detection
     meta['duplicate_rows'] = int(df.duplicated().sum())
@@ -90,8 +226,17 @@ def generate_metadata(df):
     if amount_col:
         meta['total_value'] = float(df[amount_col].sum())
         meta['avg_value'] = float(df[amount_col].mean())
-        meta['median_value'] = float(df[amount_col].median())
+        meta['median_value'] = fast_median(df[amount_col])
         meta['total_transactions'] = len(df)
+        # Distribution stats reused by the anomaly detectors instead of re-sorting the column
+        pcts = [1, 5, 25, 50, 75, 95, 99]
+        quantiles = df[amount_col].quantile([p / 100 for p in pcts])
+        meta['amount_stats'] = {
+            'column': amount_col,
+            'mean': meta['avg_value'],
+            'std': float(df[amount_col].std()),
+            'percentiles': {str(p): float(q) for p, q in zip(pcts, quantiles)},
+        }
 
     # Time range
     date_col = meta['roles'].get('date')
@@ -3,7 +3,7 @@ Intelligent Insight Engine — Auto-generates 8-10 financial insights from data.
 """
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, format_number, format_pct, safe_divide
+from src.utils import format_currency, format_number, format_pct, safe_divide, group_sum
 
 
 def generate_insights(df, metadata):
@@ -35,7 +35,7 @@ def generate_insights(df, metadata):
 
     # 2. Monthly Growth Analysis
     if date_col:
-        monthly = df.set_index(date_col).resample('M')[amount_col].agg(['sum', 'count'])
+        monthly = df.set_index(date_col).resample('ME')[amount_col].agg(['sum', 'count'])
         monthly.columns = ['Total Value', 'Volume']
         if len(monthly) >= 2:
             growth_rates = monthly['Total Value'].pct_change() * 100
@@ -62,7 +62,7 @@ def generate_insights(df, metadata):
 
     # 3. Peak Transaction Period
     if date_col:
-        monthly_value = df.set_index(date_col).resample('M')[amount_col].sum()
+        monthly_value = df.set_index(date_col).resample('ME')[amount_col].sum()
         if len(monthly_value) > 0:
             peak_month = monthly_value.idxmax()
             peak_value = monthly_value.max()
@@ -78,7 +78,7 @@ def generate_insights(df, metadata):
 
     # 4. Top Contributing Region
     if region_col:
-        state_totals = df.groupby(region_col)[amount_col].sum().sort_values(ascending=False)
+        state_totals = group_sum(df, region_col, amount_col).sort_values(ascending=False)
         top_state = state_totals.index[0]
         top_share = state_totals.iloc[0] / total_value * 100
         top3_share = state_totals.head(3).sum() / total_value * 100
@@ -92,7 +92,7 @@ def generate_insights(df, metadata):
 
     # 5. Category Distribution
     if category_col:
-        cat_totals = df.groupby(category_col)[amount_col].sum().sort_values(ascending=False)
+        cat_totals = group_sum(df, category_col, amount_col).sort_values(ascending=False)
         top_cat = cat_totals.index[0]
         top_cat_share = cat_totals.iloc[0] / total_value * 100
         insights.append({
@@ -165,7 +165,7 @@ def generate_insights(df, metadata):
 
     # 10. Volatility Index
     if date_col:
-        monthly_vals = df.set_index(date_col).resample('M')[amount_col].sum()
+        monthly_vals = df.set_index(date_col).resample('ME')[amount_col].sum()
         if len(monthly_vals) >= 3:
             volatility = monthly_vals.std() / monthly_vals.mean() * 100
             vol_desc = "low" if volatility < 10 else "moderate" if volatility < 25 else "high"
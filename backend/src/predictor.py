@@ -2,9 +2,82 @@
 Predictive Analytics Module — Linear trend + seasonal decomposition forecasting.
 Includes train/test split, RMSE metric, and explainability.
 """
+import copy
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, format_number, format_pct, safe_divide
+from src.utils import format_currency, format_number, format_pct, safe_divide, monthly_sum_count, group_codes
+
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Month offsets and their position in the year, precomputed for the common shape
+# (up to ten years of history plus a year of horizon)
+_STEPS = np.arange(132)
+_STEPS.flags.writeable = False
+_MONTH_POS = _STEPS % 12
+_MONTH_POS.flags.writeable = False
+
+# forecast_monthly results keyed by the aggregated monthly series and model settings;
+# a page that forecasts the same filtered frame several times fits it once
+_FORECAST_CACHE = OrderedDict()
+_FORECAST_CACHE_SIZE = 32
+_FORECAST_LOCK = threading.Lock()
+
+
+def _steps(start, stop):
+    """(x, x % 12) for x in start..stop-1, as views of the precomputed tables when they fit."""
+    if stop <= len(_STEPS):
+        return _STEPS[start:stop], _MONTH_POS[start:stop]
+    x = np.arange(start, stop)
+    return x, x % 12
+
+
+def _linreg(y):
+    """Closed-form least-squares line through (0..n-1, y). Returns (slope, intercept)."""
+    n = len(y)
+    x_mean = (n - 1) / 2
+    y_mean = y.mean()
+    dx = _steps(0, n)[0] - x_mean
+    slope = dx @ (y - y_mean) / (dx @ dx)
+    return slope, y_mean - slope * x_mean
+
+
+def _error_stats(actual, predicted):
+    """
+    (RMSE, MAE, MAPE %) of predicted vs actual, all reduced from one |error| array.
+    MAPE is taken over the months with a non-zero actual (0 if there are none).
+    """
+    abs_errors = np.abs(actual - predicted)
+    m = len(abs_errors)
+    rmse = float(np.sqrt(abs_errors @ abs_errors / m))
+    mae = float(abs_errors.sum() / m)
+    nonzero = actual != 0
+    mape = float((abs_errors[nonzero] / np.abs(actual[nonzero])).mean() * 100) if nonzero.any() else 0.0
+    return rmse, mae, mape
+
+
+def _seasonal_factors(detrended):
+    """Mean detrended value per position mod 12 (0 for positions with no data)."""
+    if len(detrended) and len(detrended) % 12 == 0:
+        # Whole years: one column-wise mean over a (years, 12) view
+        return detrended.reshape(-1, 12).mean(axis=0)
+    month_idx = _steps(0, len(detrended))[1]
+    sums = np.bincount(month_idx, weights=detrended, minlength=12)
+    counts = np.bincount(month_idx, minlength=12)
+    return sums / np.maximum(counts, 1)
+
+
+def _fit_trend_seasonal(values):
+    """
+    Linear trend plus per-month seasonal factors of the detrended series.
+    Returns (slope, intercept, trend, seasonal_factors); shared by the decomposition
+    and the forecaster so the series is fitted and detrended once.
+    """
+    slope, intercept = _linreg(values)
+    trend = intercept + slope * _steps(0, len(values))[0]
+    return slope, intercept, trend, _seasonal_factors(values - trend)
 
 
 def _decompose_trend_seasonal(values):
@@ -13,29 +86,20 @@ def _decompose_trend_seasonal(values):
     if n < 3:
         return values, np.zeros(n), values
 
-    # Linear trend via polyfit
-    x = np.arange(n)
-    coeffs = np.polyfit(x, values, 1)
-    trend = np.polyval(coeffs, x)
+    # Under a full year there is no seasonal part: fit the trend alone and skip detrending
+    if n < 12:
+        slope, intercept = _linreg(values)
+        trend = intercept + slope * _steps(0, n)[0]
+        return trend, np.zeros(n), values - trend
 
     # Seasonal = residual pattern (monthly average of detrended values)
-    detrended = values - trend
-    # If we have at least 12 points, compute monthly seasonal factors
-    if n >= 12:
-        seasonal = np.zeros(n)
-        for i in range(12):
-            indices = list(range(i, n, 12))
-            seasonal_avg = np.mean(detrended[indices])
-            for idx in indices:
-                seasonal[idx] = seasonal_avg
-    else:
-        seasonal = np.zeros(n)
-
+    _, _, trend, seasonal_factors = _fit_trend_seasonal(values)
+    seasonal = seasonal_factors[_steps(0, n)[1]]
     residual = values - trend - seasonal
     return trend, seasonal, residual
 
 
-def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2):
+def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2, explain=True):
     """
     Forecast monthly transaction value using trend + seasonal decomposition.
     
@@ -43,7 +107,7 @@ def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2):
     - historical_df: DataFrame with Month, Actual, Trend, Seasonal, Fitted
     - forecast_df: DataFrame with Month, Predicted, Lower, Upper
     - metrics: dict with RMSE, MAE, train_size, test_size
-    - explanation: human-readable explanation
+    - explanation: human-readable explanation (None when explain=False)
     - model_info: dict with coefficients and methodology
     """
     roles = metadata.get('roles', {})
@@ -56,18 +120,86 @@ def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2):
             'explanation': 'Cannot generate forecast without date and amount columns.'
         }
 
-    # Aggregate monthly
-    monthly = df.set_index(date_col).resample('M')[amount_col].sum().reset_index()
-    monthly.columns = ['Month', 'Value']
-    monthly = monthly.sort_values('Month')
+    # Aggregate monthly; the model works on one contiguous float64 array
+    months, values, _ = monthly_sum_count(df, date_col, amount_col)
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    integer_amounts = pd.api.types.is_integer_dtype(df[amount_col].dtype)
+
+    key = (values.tobytes(), months.asi8.tobytes(), forecast_months, test_ratio, integer_amounts, explain)
+    with _FORECAST_LOCK:
+        cached = _FORECAST_CACHE.get(key)
+        if cached is not None:
+            _FORECAST_CACHE.move_to_end(key)
+    if cached is None:
+        cached = _forecast_series(months, values, forecast_months, test_ratio, integer_amounts, explain)
+        with _FORECAST_LOCK:
+            _FORECAST_CACHE[key] = cached
+            while len(_FORECAST_CACHE) > _FORECAST_CACHE_SIZE:
+                _FORECAST_CACHE.popitem(last=False)
+    # Callers add columns to the returned frames; never hand out the cached ones
+    return copy.deepcopy(cached)
+
+
+def forecast_monthly_batch(df, metadata, group_col, forecast_months=3, test_ratio=0.2, explain=False):
+    """
+    Run the forecast_monthly model separately for every value of group_col (e.g. per
+    category or state). Returns {group: result}, where result is shaped like
+    forecast_monthly's; groups with no dated rows are omitted. Per-group explanations
+    are skipped unless explain=True.
+    The per-group monthly sums come from one np.bincount over (group, month) codes,
+    so the frame is scanned once rather than filtered once per group.
+    """
+    roles = metadata.get('roles', {})
+    amount_col = roles.get('amount')
+    date_col = roles.get('date')
+
+    if not amount_col or not date_col:
+        return {
+            'error': 'Need both amount and date columns for forecasting.',
+            'explanation': 'Cannot generate forecast without date and amount columns.'
+        }
 
-    if len(monthly) < 4:
+    codes, labels = group_codes(df[group_col])
+    months = df[date_col].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    values = df[amount_col].to_numpy(dtype=float, na_value=np.nan)
+    keep = (codes >= 0) & ~np.isnat(months)
+    codes, months, values = codes[keep], months[keep], values[keep]
+    if months.size == 0:
+        return {}
+
+    # Dense (group x month) grids of row counts and amount sums
+    first = months.min()
+    month_codes = (months - first).astype(np.int64)
+    n_months = int(month_codes.max()) + 1
+    cells = codes.astype(np.int64) * n_months + month_codes
+    shape = (len(labels), n_months)
+    rows = np.bincount(cells, minlength=shape[0] * n_months).reshape(shape)
+    has_value = ~np.isnan(values)
+    sums = np.bincount(cells[has_value], weights=values[has_value],
+                       minlength=shape[0] * n_months).reshape(shape)
+    month_end = pd.DatetimeIndex((first + np.arange(1, n_months + 1)).astype('datetime64[D]') - 1)
+
+    integer_amounts = pd.api.types.is_integer_dtype(df[amount_col].dtype)
+    results = {}
+    for g, label in enumerate(labels):
+        # Each group's series spans its own first..last dated month, as forecast_monthly's would
+        seen = np.flatnonzero(rows[g])
+        if seen.size == 0:
+            continue
+        lo, hi = seen[0], seen[-1] + 1
+        results[label] = _forecast_series(month_end[lo:hi], np.ascontiguousarray(sums[g, lo:hi]),
+                                          forecast_months, test_ratio, integer_amounts, explain)
+    return results
+
+
+def _forecast_series(months, values, forecast_months, test_ratio, integer_amounts, explain=True):
+    """Fit trend + seasonal on a monthly series and build the forecast_monthly result."""
+    if len(values) < 4:
         return {
             'error': 'Need at least 4 months of data for forecasting.',
             'explanation': 'Insufficient historical data. Need at least 4 months.'
         }
 
-    values = monthly['Value'].values
     n = len(values)
 
     # Train/Test split
@@ -76,90 +208,74 @@ def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2):
     test_vals = values[split_idx:]
 
     # Decompose on training data
-    x_train = np.arange(len(train_vals))
-    trend_coeffs = np.polyfit(x_train, train_vals, 1)
-    slope, intercept = trend_coeffs[0], trend_coeffs[1]
-
-    # Compute trend for full series + forecast
-    x_full = np.arange(n + forecast_months)
-    trend_full = np.polyval(trend_coeffs, x_full)
-
-    # Seasonal factors from training data
-    train_trend = np.polyval(trend_coeffs, x_train)
-    detrended = train_vals - train_trend
-    seasonal_factors = np.zeros(12)
-    for i in range(12):
-        indices = [j for j in range(len(detrended)) if j % 12 == i]
-        if indices:
-            seasonal_factors[i] = np.mean(detrended[indices])
-
-    # Apply seasonal to full + forecast
-    seasonal_full = np.array([seasonal_factors[i % 12] for i in range(n + forecast_months)])
-    fitted_full = trend_full + seasonal_full
+    slope, intercept, trend_train, seasonal_factors = _fit_trend_seasonal(train_vals)
+
+    # Extend the trend over the test months and apply the seasonal factors to the history
+    x_hist, pos_hist = _steps(0, n)
+    trend_hist = np.concatenate([trend_train, intercept + slope * x_hist[split_idx:]])
+    seasonal_hist = seasonal_factors[pos_hist]
+    fitted_hist = trend_hist + seasonal_hist
+
+    # Forecast horizon
+    x_fc, pos_fc = _steps(n, n + forecast_months)
+    forecast_values = intercept + slope * x_fc + seasonal_factors[pos_fc]
 
     # Compute residual std for confidence intervals
-    fitted_train = fitted_full[:split_idx]
+    fitted_train = fitted_hist[:split_idx]
     residuals = train_vals - fitted_train
     residual_std = np.std(residuals) if len(residuals) > 1 else 0
 
     # Metrics on test set
     if len(test_vals) > 0:
-        fitted_test = fitted_full[split_idx:n]
-        test_errors = test_vals - fitted_test
-        rmse = float(np.sqrt(np.mean(test_errors ** 2)))
-        mae = float(np.mean(np.abs(test_errors)))
-        mape = float(np.mean(np.abs(test_errors) / np.maximum(test_vals, 1)) * 100)
+        rmse, mae, mape = _error_stats(test_vals, fitted_hist[split_idx:])
     else:
-        rmse = float(np.sqrt(np.mean(residuals ** 2)))
-        mae = float(np.mean(np.abs(residuals)))
+        rmse, mae, _ = _error_stats(train_vals, fitted_train)
         mape = 0
 
     # Build historical DataFrame
+    split_codes = np.zeros(n, dtype=np.int8)
+    split_codes[split_idx:] = 1
     historical_df = pd.DataFrame({
-        'Month': monthly['Month'],
-        'Actual': values,
-        'Trend': trend_full[:n],
-        'Seasonal': seasonal_full[:n],
-        'Fitted': fitted_full[:n],
-        'Split': ['Train'] * split_idx + ['Test'] * (n - split_idx),
+        'Month': months,
+        'Actual': values.astype(np.int64) if integer_amounts else values,
+        'Trend': trend_hist,
+        'Seasonal': seasonal_hist,
+        'Fitted': fitted_hist,
+        'Split': pd.Categorical.from_codes(split_codes, categories=['Train', 'Test']),
     })
 
     # Build forecast DataFrame
-    last_month = monthly['Month'].iloc[-1]
+    last_month = months[-1]
     forecast_months_list = pd.date_range(start=last_month + pd.offsets.MonthEnd(1),
                                           periods=forecast_months, freq='ME')
-    forecast_values = fitted_full[n:n + forecast_months]
+    # Round to cents as rint(x * 100) / 100, which is what ndarray.round(2) computes
+    half_ci = 1.96 * residual_std
     forecast_df = pd.DataFrame({
         'Month': forecast_months_list,
-        'Predicted': forecast_values.round(2),
-        'Lower (95%)': (forecast_values - 1.96 * residual_std).round(2),
-        'Upper (95%)': (forecast_values + 1.96 * residual_std).round(2),
+        'Predicted': np.rint(forecast_values * 100) / 100,
+        'Lower (95%)': np.rint((forecast_values - half_ci) * 100) / 100,
+        'Upper (95%)': np.rint((forecast_values + half_ci) * 100) / 100,
     })
 
-    # Direction analysis
-    if slope > 0:
-        trend_direction = "upward"
-        trend_desc = f"increasing by approximately {format_currency(abs(slope))} per month"
-    else:
-        trend_direction = "downward"
-        trend_desc = f"decreasing by approximately {format_currency(abs(slope))} per month"
-
-    # Seasonal analysis
-    peak_month_idx = int(np.argmax(seasonal_factors))
-    month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    peak_month_name = month_names[peak_month_idx % 12] if peak_month_idx < 12 else 'N/A'
-
-    explanation = (
-        f"**Forecast Model**: Linear trend + seasonal decomposition.\n\n"
-        f"**Trend**: The data shows an **{trend_direction}** trend, {trend_desc}.\n\n"
-        f"**Seasonality**: Peak activity occurs in **{peak_month_name}** based on historical patterns.\n\n"
-        f"**Accuracy**: RMSE = **{format_currency(rmse)}**, MAE = **{format_currency(mae)}**"
-        f"{f', MAPE = **{mape:.1f}%**' if mape > 0 else ''}. "
-        f"Trained on **{split_idx}** months, tested on **{n - split_idx}** months.\n\n"
-        f"**Next {len(forecast_df)} months**: Predicted total = **{format_currency(forecast_values.sum())}**.\n\n"
-        f"⚠️ *This is a simple statistical model (not deep ML). Predictions assume historical trends continue.*"
-    )
+    # Direction and seasonal analysis
+    trend_direction = "upward" if slope > 0 else "downward"
+    peak_month_name = MONTH_NAMES[int(np.argmax(seasonal_factors))]
+
+    # The narrative costs several currency formats; skip it when the caller won't show it
+    explanation = None
+    if explain:
+        trend_desc = (f"{'increasing' if slope > 0 else 'decreasing'} by approximately "
+                      f"{format_currency(abs(slope))} per month")
+        explanation = (
+            f"**Forecast Model**: Linear trend + seasonal decomposition.\n\n"
+            f"**Trend**: The data shows an **{trend_direction}** trend, {trend_desc}.\n\n"
+            f"**Seasonality**: Peak activity occurs in **{peak_month_name}** based on historical patterns.\n\n"
+            f"**Accuracy**: RMSE = **{format_currency(rmse)}**, MAE = **{format_currency(mae)}**"
+            f"{f', MAPE = **{mape:.1f}%**' if mape > 0 else ''}. "
+            f"Trained on **{split_idx}** months, tested on **{n - split_idx}** months.\n\n"
+            f"**Next {len(forecast_df)} months**: Predicted total = **{format_currency(forecast_values.sum())}**.\n\n"
+            f"⚠️ *This is a simple statistical model (not deep ML). Predictions assume historical trends continue.*"
+        )
 
     return {
         'historical_df': historical_df,
@@ -178,7 +294,7 @@ def forecast_monthly(df, metadata, forecast_months=3, test_ratio=0.2):
             'method': 'Linear Trend + Seasonal Decomposition',
             'trend_direction': trend_direction,
             'peak_seasonal_month': peak_month_name,
-            'seasonal_factors': {month_names[i]: round(seasonal_factors[i], 2) for i in range(12)},
+            'seasonal_factors': dict(zip(MONTH_NAMES, seasonal_factors.round(2).tolist())),
             'confidence_interval': '95%',
         }
     }
@@ -195,25 +311,20 @@ def forecast_volume(df, metadata, forecast_months=3):
     if not date_col:
         return {'error': 'Need date column for volume forecasting.'}
 
-    monthly = df.set_index(date_col).resample('M').size().reset_index(name='Count')
-    monthly.columns = ['Month', 'Value']
-    monthly = monthly.sort_values('Month')
+    # Without a value column the monthly "sums" are float64 row counts: the model input as-is
+    months, values, counts = monthly_sum_count(df, date_col)
+    monthly = pd.DataFrame({'Month': months, 'Value': counts})
 
     if len(monthly) < 4:
         return {'error': 'Insufficient data for volume forecast.'}
 
-    values = monthly['Value'].values.astype(float)
     n = len(values)
 
     # Simple linear forecast
-    x = np.arange(n)
-    coeffs = np.polyfit(x, values, 1)
-    slope = coeffs[0]
-
-    x_forecast = np.arange(n, n + forecast_months)
-    predicted = np.polyval(coeffs, x_forecast)
+    slope, intercept = _linreg(values)
+    predicted = intercept + slope * _steps(n, n + forecast_months)[0]
 
-    last_month = monthly['Month'].iloc[-1]
+    last_month = months[-1]
     forecast_months_list = pd.date_range(start=last_month + pd.offsets.MonthEnd(1),
                                           periods=forecast_months, freq='ME')
 
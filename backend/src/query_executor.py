@@ -2,36 +2,243 @@
 Query Execution Engine — Takes structured JSON plans and executes them via Pandas.
 Returns result DataFrame, chart specification, explanation, and execution time.
 """
+import os
+import copy
+import json
 import time
+import operator
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, format_number, safe_match_column, get_numeric_columns
+from src.utils import format_currency, format_number, safe_match_column, get_numeric_columns, is_text_column, fast_median, group_codes, group_sum
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# Comparison filters, by plan op; 'in' is handled separately with isin
+_FILTER_OPS = {
+    '==': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '<': operator.lt,
+    '>=': operator.ge, '<=': operator.le,
+}
 
 
 def apply_filters(df, filters):
-    """Apply a list of filter conditions to DataFrame."""
-    filtered = df.copy()
+    """
+    Apply a list of filter conditions to DataFrame.
+    The conditions are AND-ed into one boolean mask and the rows gathered once;
+    with nothing to apply, df itself is returned.
+    """
+    if not filters:
+        return df
+    mask = None
     for f in filters:
         col = f['column']
         op = f['op']
         val = f['value']
-        if col not in filtered.columns:
+        if col not in df.columns:
             continue
-        if op == '==':
-            filtered = filtered[filtered[col] == val]
-        elif op == '!=':
-            filtered = filtered[filtered[col] != val]
-        elif op == '>':
-            filtered = filtered[filtered[col] > val]
-        elif op == '<':
-            filtered = filtered[filtered[col] < val]
-        elif op == '>=':
-            filtered = filtered[filtered[col] >= val]
-        elif op == '<=':
-            filtered = filtered[filtered[col] <= val]
-        elif op == 'in':
-            filtered = filtered[filtered[col].isin(val)]
-    return filtered
+        if op == 'in':
+            cond = df[col].isin(val)
+        elif op in _FILTER_OPS:
+            cond = _FILTER_OPS[op](df[col], val)
+        else:
+            continue
+        # Nullable dtypes compare to <NA>; treat those rows as not matching
+        cond = cond.to_numpy(dtype=bool, na_value=False)
+        if mask is None:
+            mask = cond
+        else:
+            mask &= cond
+    if mask is None:
+        return df
+    return df[mask]
+
+
+def _observed_counts(series):
+    """value_counts() without the zero rows a filtered Categorical reports for unused categories."""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+
+def _group_counts(df, group_col):
+    """
+    Same table as df.groupby(group_col, observed=True).size().reset_index(name='Count'),
+    counted in a single value_counts pass instead of building a grouper.
+    """
+    counts = df[group_col].value_counts(sort=False)
+    counts = counts[counts > 0].sort_index()
+    return counts.rename_axis(group_col).reset_index(name='Count')
+
+
+# Single-key aggregations execute_plan runs, mapped to the decimals their result is
+# rounded to (None: as computed). From _ARROW_GROUPBY_MIN_ROWS rows up they go through
+# Arrow's multi-threaded hash aggregation instead of pandas groupby.
+_GROUP_AGGS = {'sum': None, 'mean': 2, 'count': None, 'max': None, 'min': None}
+_ARROW_GROUPBY_MIN_ROWS = 1_000_000
+
+
+def _aggregate(df, group_col, value_col, agg):
+    """
+    Grouped `agg` of value_col as a (group_col, value_col) frame, rounded per
+    _GROUP_AGGS; an aggregation name the executor doesn't know falls back to sum.
+    """
+    if agg not in _GROUP_AGGS:
+        agg = 'sum'
+    grouped = _group_agg(df, group_col, value_col, agg)
+    if _GROUP_AGGS[agg] is not None:
+        grouped = grouped.round(_GROUP_AGGS[agg])
+    return grouped.reset_index()
+
+
+def _group_agg(df, group_col, value_col, agg):
+    """
+    df.groupby(group_col, observed=True)[value_col].<agg>() for agg in _GROUP_AGGS.
+    Large frames are aggregated by pyarrow (when installed) and reshaped to the pandas
+    result: missing keys dropped, sorted by key, empty sums as 0.
+    """
+    if pa is not None and len(df) >= _ARROW_GROUPBY_MIN_ROWS:
+        try:
+            table = pa.Table.from_pandas(df[[group_col, value_col]], preserve_index=False)
+            out = table.group_by(group_col).aggregate([(value_col, agg)])
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass  # e.g. mixed-type object keys; pandas handles those
+        else:
+            values = out.column(f"{value_col}_{agg}").to_pandas()
+            if agg == 'sum':
+                values = values.fillna(0)
+            result = pd.Series(values.to_numpy(), name=value_col,
+                               index=pd.Index(out.column(group_col).to_pandas(), name=group_col))
+            return result[result.index.notna()].sort_index()
+    if agg in ('sum', 'count', 'mean') and pd.api.types.is_numeric_dtype(df[value_col].dtype):
+        return _bincount_agg(df, group_col, value_col, agg)
+    return getattr(df.groupby(group_col, observed=True)[value_col], agg)()
+
+
+def _bincount_agg(df, group_col, value_col, agg):
+    """
+    sum/count/mean of a numeric column by group via np.bincount over the key's codes,
+    like utils.group_sum: a categorical key's stored codes are used as-is, so no
+    groupby object is built and nothing is re-hashed.
+    """
+    if agg == 'sum':
+        return group_sum(df, group_col, value_col)
+    codes, labels = group_codes(df[group_col])
+    values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+
+    present = codes >= 0
+    codes, values = codes[present], values[present]
+    seen = np.bincount(codes, minlength=len(labels)) > 0
+    valid = ~np.isnan(values)
+    counts = np.bincount(codes[valid], minlength=len(labels))
+    if agg == 'count':
+        out = counts
+    else:
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=len(labels))
+        with np.errstate(invalid='ignore'):
+            out = sums / counts
+    return pd.Series(out[seen], index=pd.Index(labels[seen], name=group_col), name=value_col)
+
+
+# Frames at least this long get their data_quality reductions spread over threads
+_PARALLEL_MIN_ROWS = 100_000
+
+
+def _quality_stats(df):
+    """
+    (missing per column, distinct values per column, duplicate row count) for the
+    data_quality intent. On a multi-core machine, large frames compute the row-duplicate
+    scan and the per-column reductions concurrently in a thread pool; pandas' hashing
+    and isna kernels run without the GIL for numeric, datetime and categorical columns.
+    """
+    workers = min(os.cpu_count() or 1, len(df.columns) + 1)
+    if workers < 2 or len(df) < _PARALLEL_MIN_ROWS:
+        return df.isna().sum().to_numpy(), df.nunique().to_numpy(), int(df.duplicated().sum())
+
+    def column_stats(i):
+        col = df.iloc[:, i]
+        return int(col.isna().sum()), col.nunique()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        dups = pool.submit(lambda: int(df.duplicated().sum()))
+        stats = list(pool.map(column_stats, range(len(df.columns))))
+        dup_count = dups.result()
+    missing = np.array([m for m, _ in stats], dtype=np.int64)
+    unique = np.array([u for _, u in stats], dtype=np.int64)
+    return missing, unique, dup_count
+
+
+def _status_table(df, group_col, status_col):
+    """
+    Group x status row counts, shaped like the pivot_table of a two-key groupby size():
+    one row per observed group (sorted), one float column per observed status, with
+    group_col as the first column. Filled by one np.bincount over the combined codes.
+    """
+    g_codes, g_labels = group_codes(df[group_col])
+    s_codes, s_labels = group_codes(df[status_col])
+    present = (g_codes >= 0) & (s_codes >= 0)
+    n_status = len(s_labels)
+    flat = g_codes[present].astype(np.int64) * n_status + s_codes[present]
+    table = np.bincount(flat, minlength=len(g_labels) * n_status).reshape(len(g_labels), n_status)
+
+    rows = table.sum(axis=1) > 0
+    cols = table.sum(axis=0) > 0
+    pivot = pd.DataFrame(table[rows][:, cols].astype(float), columns=pd.Index(s_labels[cols], name=status_col))
+    pivot.insert(0, group_col, g_labels[rows])
+    return pivot
+
+
+def _lowered_values(series):
+    """
+    Distinct strings of a text column grouped by their lower-cased form:
+    {lowered: [raw values]}, in order of first appearance, for O(1) membership.
+    Only the distinct values are lower-cased, not every row.
+    """
+    lowered = {}
+    for v in series.unique():
+        if isinstance(v, str):
+            lowered.setdefault(v.lower(), []).append(v)
+    return lowered
+
+
+# group_by keys derived from the date role: (label column, period frequency)
+_PERIOD_GROUPS = {'month': ('_month', 'M'), 'quarter': ('_quarter', 'Q'), 'week': ('_week', 'W')}
+
+# id(df) -> (weakref to df, {(date_col, freq): labels}); entries drop when df is collected
+_period_cache = {}
+
+
+def _period_labels(dates, freq):
+    """
+    Period labels ('2024-03', '2024Q1', ...) for a datetime column as a Categorical:
+    only the distinct periods are formatted, and groupby hashes int codes, not strings.
+    Categories are in chronological order, which is also their string order; NaT
+    stays a 'NaT' group as it was with astype(str).
+    """
+    codes, periods = pd.factorize(dates.dt.to_period(freq), sort=True, use_na_sentinel=False)
+    return pd.Categorical.from_codes(codes, categories=periods.astype(str))
+
+
+def cached_period_labels(df, date_col, freq):
+    """
+    _period_labels(df[date_col], freq), computed once per DataFrame object so repeated
+    queries against the loaded dataset reuse it. Aligned with df's rows.
+    """
+    key = id(df)
+    entry = _period_cache.get(key)
+    if entry is None or entry[0]() is not df:
+        entry = (weakref.ref(df, lambda _, key=key: _period_cache.pop(key, None)), {})
+        _period_cache[key] = entry
+    labels = entry[1].get((date_col, freq))
+    if labels is None:
+        labels = entry[1][(date_col, freq)] = _period_labels(df[date_col], freq)
+    return labels
 
 
 def resolve_group_column(df, group_by, metadata):
@@ -39,18 +246,15 @@ def resolve_group_column(df, group_by, metadata):
     roles = metadata.get('roles', {})
     date_col = roles.get('date')
 
-    if group_by == 'month' and date_col:
-        df = df.copy()
-        df['_month'] = df[date_col].dt.to_period('M').astype(str)
-        return df, '_month'
-    elif group_by == 'quarter' and date_col:
-        df = df.copy()
-        df['_quarter'] = df[date_col].dt.to_period('Q').astype(str)
-        return df, '_quarter'
-    elif group_by == 'week' and date_col:
-        df = df.copy()
-        df['_week'] = df[date_col].dt.to_period('W').astype(str)
-        return df, '_week'
+    if group_by in _PERIOD_GROUPS and date_col:
+        name, freq = _PERIOD_GROUPS[group_by]
+        # execute_plan attaches the column from the per-DataFrame cache when it can
+        if name not in df.columns:
+            # Shallow copy: the new frame shares df's column blocks and only adds one
+            labels = _period_labels(df[date_col], freq)
+            df = df.copy(deep=False)
+            df[name] = labels
+        return df, name
     elif group_by in df.columns:
         return df, group_by
     else:
@@ -61,12 +265,106 @@ def resolve_group_column(df, group_by, metadata):
     return df, group_by
 
 
+# Intents whose result falls back to raw rows when the group column can't be resolved
+_GROUPED_INTENTS = {
+    'trend_analysis', 'month_over_month', 'peak_analysis', 'top_k', 'bottom_k', 'distribution',
+}
+# Intents whose result can show every column of the data
+_FULL_WIDTH_INTENTS = {'comparison', 'data_quality'}
+# Intents that don't read the filtered frame at all
+_NO_DATA_INTENTS = {'explanation', 'scenario', 'forecast'}
+_KNOWN_INTENTS = _GROUPED_INTENTS | _FULL_WIDTH_INTENTS | _NO_DATA_INTENTS | {
+    'total_volume', 'total_value', 'average_value', 'fraud', 'failure_analysis', 'concentration', 'histogram',
+}
+
+
+# execute_plan results keyed by (plan, roles, metadata['fingerprint'], shape)
+_PLAN_CACHE = OrderedDict()
+_PLAN_CACHE_SIZE = 128
+_PLAN_LOCK = threading.Lock()
+
+
+def _required_columns(plan, metadata, df, metric_col, use_count):
+    """
+    Columns execute_plan reads from the filtered frame for this plan, or None when the
+    result may show whole rows (comparison, data quality, raw-row fallbacks) and the
+    frame has to keep every column.
+    """
+    intent = plan.get('intent', 'general')
+    group_by = plan.get('group_by')
+    roles = metadata.get('roles', {})
+    if intent in _FULL_WIDTH_INTENTS:
+        return None
+
+    needed = {f['column'] for f in plan.get('filters', [])}
+    if intent in _NO_DATA_INTENTS:
+        return needed
+
+    if group_by:
+        # Source column resolve_group_column will derive the group from
+        if group_by in _PERIOD_GROUPS and roles.get('date'):
+            group_src = roles['date']
+        elif group_by in df.columns:
+            group_src = group_by
+        else:
+            group_src = safe_match_column(df, group_by)
+        if group_src:
+            needed.add(group_src)
+        elif intent in _GROUPED_INTENTS or intent not in _KNOWN_INTENTS:
+            return None
+    elif intent in _GROUPED_INTENTS or intent not in _KNOWN_INTENTS:
+        return None
+
+    if not use_count:
+        needed.add(metric_col)
+    if intent in ('total_value', 'average_value', 'histogram', 'concentration'):
+        needed.add(roles.get('amount'))
+    elif intent == 'fraud':
+        needed.add(roles.get('fraud'))
+    elif intent == 'failure_analysis':
+        needed.add(roles.get('status') or safe_match_column(df, 'status'))
+    return needed
+
+
 def execute_plan(plan, df, metadata):
     """
     Execute a structured query plan against the DataFrame.
     Returns dict with: result_df, chart_spec, explanation, exec_time_ms
+    Results are memoized per (plan, roles, dataset fingerprint): re-running the same
+    question against the loaded dataset, or a copy of it, returns a copy of the earlier
+    result. Frames whose metadata has no fingerprint are never cached.
     """
     start = time.time()
+    fingerprint = metadata.get('fingerprint')
+    if fingerprint is None:
+        return _run_plan(plan, df, metadata)
+
+    key = (
+        json.dumps(plan, sort_keys=True, default=str),
+        json.dumps(metadata.get('roles', {}), sort_keys=True, default=str),
+        fingerprint, df.shape,
+    )
+    with _PLAN_LOCK:
+        cached = _PLAN_CACHE.get(key)
+        if cached is not None:
+            _PLAN_CACHE.move_to_end(key)
+    if cached is not None:
+        # Callers may add columns to result_df; never hand out the cached frame
+        result = copy.deepcopy(cached)
+        result.update(plan=plan, exec_time_ms=round((time.time() - start) * 1000, 1))
+        return result
+
+    result = _run_plan(plan, df, metadata)
+    with _PLAN_LOCK:
+        _PLAN_CACHE[key] = copy.deepcopy(result)
+        while len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.popitem(last=False)
+    return result
+
+
+def _run_plan(plan, df, metadata):
+    """Body of execute_plan: run one plan against df, uncached."""
+    start = time.time()
 
     intent = plan.get('intent', 'general')
     agg = plan.get('aggregation', 'sum')
@@ -95,8 +393,14 @@ def execute_plan(plan, df, metadata):
                 use_count = True
                 display_metric = 'Transaction Count'
 
-    # Apply filters
-    filtered = apply_filters(df, filters)
+    # Project to the columns this plan reads, then apply filters
+    needed = _required_columns(plan, metadata, df, metric_col, use_count)
+    projected = df if needed is None else df.loc[:, [c for c in df.columns if c in needed]]
+    if needed is not None and group_by in _PERIOD_GROUPS and roles.get('date') in df.columns:
+        # Period labels come from the cache for the whole frame and are filtered with it
+        name, freq = _PERIOD_GROUPS[group_by]
+        projected[name] = cached_period_labels(df, roles['date'], freq)
+    filtered = apply_filters(projected, filters)
     filter_desc = ""
     if filters:
         parts = [f"{f['column']} {f['op']} {f['value']}" for f in filters]
@@ -134,23 +438,12 @@ def execute_plan(plan, df, metadata):
             filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
             if actual_group in filtered.columns:
                 if use_count:
-                    grouped = filtered.groupby(actual_group).size().reset_index(name='Count')
+                    grouped = _group_counts(filtered, actual_group)
                     grouped = grouped.sort_values(actual_group)
                     result_df = grouped
                     explanation = f"Transaction count by **{group_by}**."
                 else:
-                    if agg == 'sum':
-                        grouped = filtered.groupby(actual_group)[metric_col].sum().reset_index()
-                    elif agg == 'mean':
-                        grouped = filtered.groupby(actual_group)[metric_col].mean().round(2).reset_index()
-                    elif agg == 'count':
-                        grouped = filtered.groupby(actual_group)[metric_col].count().reset_index()
-                    elif agg == 'max':
-                        grouped = filtered.groupby(actual_group)[metric_col].max().reset_index()
-                    elif agg == 'min':
-                        grouped = filtered.groupby(actual_group)[metric_col].min().reset_index()
-                    else:
-                        grouped = filtered.groupby(actual_group)[metric_col].sum().reset_index()
+                    grouped = _aggregate(filtered, actual_group, metric_col, agg)
                     grouped = grouped.sort_values(actual_group)
                     result_df = grouped
                     explanation = f"{agg.title()} of **{display_metric}** by **{group_by}**."
@@ -164,7 +457,8 @@ def execute_plan(plan, df, metadata):
                 if intent == 'peak_analysis':
                     val_col = result_df.columns[-1] if len(result_df.columns) >= 2 else result_df.columns[0]
                     if len(result_df) > 0:
-                        peak_row = result_df.loc[result_df[val_col].idxmax()]
+                        vals = result_df[val_col].to_numpy(dtype=float, na_value=np.nan)
+                        peak_row = result_df.iloc[int(np.nanargmax(vals))]
                         explanation += f" Peak: **{peak_row.iloc[0]}** with {format_number(peak_row[val_col])}."
             else:
                 explanation = f"Could not resolve group column: {group_by}"
@@ -174,10 +468,11 @@ def execute_plan(plan, df, metadata):
             result_df = filtered.head(20)
 
         # Add 'Why?' reasoning for trend
-        if intent == 'trend_analysis' and len(result_df) >= 2:
-            val_col = result_df.columns[-1]
-            first_val = result_df[val_col].iloc[0]
-            last_val = result_df[val_col].iloc[-1]
+        if (intent == 'trend_analysis' and len(result_df) >= 2
+                and pd.api.types.is_numeric_dtype(result_df.iloc[:, -1].dtype)):
+            # Pull the value column out once; every figure below reads this array
+            vals = result_df.iloc[:, -1].to_numpy(dtype=float, na_value=np.nan)
+            first_val, last_val = vals[0], vals[-1]
             if first_val > 0:
                 overall_change = ((last_val / first_val) - 1) * 100
                 direction = "increased" if overall_change > 0 else "decreased"
@@ -185,11 +480,13 @@ def execute_plan(plan, df, metadata):
                               f"values {direction} by **{overall_change:+.1f}%** "
                               f"from {format_number(first_val)} to {format_number(last_val)}.")
                 # Find biggest jump
-                changes = result_df[val_col].pct_change() * 100
-                if len(changes.dropna()) > 0:
-                    max_change_idx = changes.abs().idxmax()
-                    max_change = changes.loc[max_change_idx]
-                    period = result_df.iloc[max_change_idx][result_df.columns[0]]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    changes = (vals[1:] / vals[:-1] - 1) * 100
+                if not np.isnan(changes).all():
+                    # changes[i] is the move into period i + 1
+                    i = int(np.nanargmax(np.abs(changes)))
+                    max_change = changes[i]
+                    period = result_df.iat[i + 1, 0]
                     explanation += (f" Largest single-period change: **{max_change:+.1f}%** "
                                   f"at **{period}**.")
 
@@ -198,17 +495,15 @@ def execute_plan(plan, df, metadata):
             filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
             if actual_group in filtered.columns:
                 if use_count:
-                    grouped = filtered.groupby(actual_group).size().reset_index(name='Count')
+                    grouped = _group_counts(filtered, actual_group)
                     sort_col = 'Count'
                 else:
-                    if agg == 'mean':
-                        grouped = filtered.groupby(actual_group)[metric_col].mean().round(2).reset_index()
-                    else:
-                        grouped = filtered.groupby(actual_group)[metric_col].sum().reset_index()
+                    grouped = _aggregate(filtered, actual_group, metric_col, 'mean' if agg == 'mean' else 'sum')
                     sort_col = metric_col
 
-                ascending = intent == 'bottom_k'
-                grouped = grouped.sort_values(sort_col, ascending=ascending).head(k).reset_index(drop=True)
+                # Partial selection of the k rows rather than a full sort of every group
+                grouped = grouped.nsmallest(k, sort_col) if intent == 'bottom_k' else grouped.nlargest(k, sort_col)
+                grouped = grouped.reset_index(drop=True)
                 result_df = grouped
                 direction = "Bottom" if intent == 'bottom_k' else "Top"
                 explanation = f"{direction} {k} **{actual_group}** by {agg} of **{display_metric}**."
@@ -231,10 +526,10 @@ def execute_plan(plan, df, metadata):
             filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
             if actual_group in filtered.columns:
                 if use_count:
-                    grouped = filtered.groupby(actual_group).size().reset_index(name='Count')
+                    grouped = _group_counts(filtered, actual_group)
                     grouped['Share %'] = (grouped['Count'] / grouped['Count'].sum() * 100).round(2)
                 else:
-                    grouped = filtered.groupby(actual_group)[metric_col].sum().reset_index()
+                    grouped = _aggregate(filtered, actual_group, metric_col, 'sum')
                     grouped['Share %'] = (grouped[metric_col] / grouped[metric_col].sum() * 100).round(2)
                 grouped = grouped.sort_values('Share %', ascending=False)
                 result_df = grouped
@@ -253,7 +548,7 @@ def execute_plan(plan, df, metadata):
             if group_by:
                 filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
                 if actual_group in filtered.columns:
-                    grouped = filtered.groupby(actual_group).agg(
+                    grouped = filtered.groupby(actual_group, observed=True).agg(
                         Total=(fraud_col, 'count'),
                         Fraud_Count=(fraud_col, 'sum')
                     ).reset_index()
@@ -279,19 +574,18 @@ def execute_plan(plan, df, metadata):
             if group_by:
                 filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
                 if actual_group in filtered.columns:
-                    grouped = filtered.groupby([actual_group, status_col]).size().reset_index(name='Count')
-                    pivot = grouped.pivot_table(index=actual_group, columns=status_col, values='Count', fill_value=0).reset_index()
+                    pivot = _status_table(filtered, actual_group, status_col)
                     if 'SUCCESS' in pivot.columns and 'FAILED' in pivot.columns:
                         pivot['Success Rate %'] = (pivot['SUCCESS'] / (pivot['SUCCESS'] + pivot['FAILED']) * 100).round(2)
                         pivot = pivot.sort_values('Success Rate %', ascending=True)
                     result_df = pivot
                     explanation = f"Success/Failure analysis by **{actual_group}**."
                 else:
-                    result_df = filtered[status_col].value_counts().reset_index()
+                    result_df = _observed_counts(filtered[status_col]).reset_index()
                     result_df.columns = ['Status', 'Count']
                     explanation = "Transaction status distribution."
             else:
-                result_df = filtered[status_col].value_counts().reset_index()
+                result_df = _observed_counts(filtered[status_col]).reset_index()
                 result_df.columns = ['Status', 'Count']
                 total = result_df['Count'].sum()
                 success = result_df.loc[result_df['Status'] == 'SUCCESS', 'Count'].sum()
@@ -307,8 +601,8 @@ def execute_plan(plan, df, metadata):
             # Try to find which column these entities belong to
             comparison_col = None
             for col in filtered.columns:
-                if filtered[col].dtype == 'object':
-                    vals = filtered[col].str.lower().unique()
+                if is_text_column(filtered[col]):
+                    vals = _lowered_values(filtered[col])
                     if entity_a.lower() in vals and entity_b.lower() in vals:
                         comparison_col = col
                         break
@@ -322,14 +616,21 @@ def execute_plan(plan, df, metadata):
                         break
 
             if comparison_col and amount_col:
-                group_a = filtered[filtered[comparison_col].str.lower() == entity_a.lower()]
-                group_b = filtered[filtered[comparison_col].str.lower() == entity_b.lower()]
-                a_sum = group_a[amount_col].sum()
-                b_sum = group_b[amount_col].sum()
-                a_count = len(group_a)
-                b_count = len(group_b)
-                a_avg = group_a[amount_col].mean() if a_count > 0 else 0
-                b_avg = group_b[amount_col].mean() if b_count > 0 else 0
+                # Select both entities' rows by their raw spellings (vals is the matched
+                # column's) and group them by lower-cased label in one groupby
+                key_a, key_b = entity_a.lower(), entity_b.lower()
+                to_key = {raw: low for low in (key_a, key_b) for raw in vals[low]}
+                column = filtered[comparison_col]
+                mask = column.isin(list(to_key)).to_numpy()
+                stats = filtered.loc[mask, amount_col].groupby(
+                    column[mask].map(to_key).to_numpy(dtype=object)
+                ).agg(['sum', 'size', 'mean'])
+                a_sum = stats.at[key_a, 'sum'] if key_a in stats.index else 0
+                b_sum = stats.at[key_b, 'sum'] if key_b in stats.index else 0
+                a_count = int(stats.at[key_a, 'size']) if key_a in stats.index else 0
+                b_count = int(stats.at[key_b, 'size']) if key_b in stats.index else 0
+                a_avg = stats.at[key_a, 'mean'] if a_count > 0 else 0
+                b_avg = stats.at[key_b, 'mean'] if b_count > 0 else 0
 
                 result_df = pd.DataFrame({
                     'Metric': ['Total Value (INR)', 'Transaction Count', 'Average Value (INR)'],
@@ -350,20 +651,14 @@ def execute_plan(plan, df, metadata):
             result_df = pd.DataFrame()
 
     elif intent == 'data_quality':
-        cols_info = []
-        for col in filtered.columns:
-            missing = int(filtered[col].isna().sum())
-            missing_pct = round(missing / len(filtered) * 100, 2)
-            unique = int(filtered[col].nunique())
-            cols_info.append({
-                'Column': col,
-                'Missing': missing,
-                'Missing %': missing_pct,
-                'Unique Values': unique,
-                'Data Type': str(filtered[col].dtype)
-            })
-        result_df = pd.DataFrame(cols_info)
-        dup_count = filtered.duplicated().sum()
+        missing, unique, dup_count = _quality_stats(filtered)
+        result_df = pd.DataFrame({
+            'Column': filtered.columns,
+            'Missing': missing,
+            'Missing %': (missing / len(filtered) * 100).round(2),
+            'Unique Values': unique,
+            'Data Type': filtered.dtypes.astype(str).to_numpy(),
+        })
         explanation = f"Data quality report: **{len(filtered)}** rows, **{len(filtered.columns)}** columns, **{dup_count}** duplicate rows."
         viz = 'table'
 
@@ -371,19 +666,18 @@ def execute_plan(plan, df, metadata):
         if group_by and amount_col:
             filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
             if actual_group in filtered.columns:
-                grouped = filtered.groupby(actual_group)[amount_col].sum().reset_index()
-                total = grouped[amount_col].sum()
-                grouped['Share %'] = (grouped[amount_col] / total * 100).round(2)
-                grouped = grouped.sort_values(amount_col, ascending=False)
-
-                # HHI
-                shares = grouped['Share %'] / 100
-                hhi = (shares ** 2).sum()
-
-                # Top contributor
-                top_share = grouped['Share %'].iloc[0]
-
-                result_df = grouped
+                grouped = _aggregate(filtered, actual_group, amount_col, 'sum')
+                values = grouped[amount_col].to_numpy(dtype=float)
+                share_pct = (values / values.sum() * 100).round(2)
+                grouped['Share %'] = share_pct
+
+                # HHI and the top contributor are order-independent: no sort needed
+                shares = share_pct / 100
+                hhi = float((shares * shares).sum())
+                top_share = share_pct[int(share_pct.argmax())]
+
+                # Sorted only for display
+                result_df = grouped.sort_values(amount_col, ascending=False)
                 explanation = (f"Concentration analysis by **{actual_group}**. "
                               f"HHI Index: **{hhi:.4f}** (0=perfect competition, 1=monopoly). "
                               f"Top contributor holds **{top_share}%** share.")
@@ -417,7 +711,8 @@ def execute_plan(plan, df, metadata):
     elif intent == 'histogram':
         if amount_col:
             # Create histogram bins
-            values = filtered[amount_col].dropna()
+            # One ndarray feeds the histogram, mean and median
+            values = filtered[amount_col].dropna().to_numpy()
             counts, bin_edges = np.histogram(values, bins=20)
             bin_labels = [f"{bin_edges[i]:.0f}-{bin_edges[i+1]:.0f}" for i in range(len(counts))]
             result_df = pd.DataFrame({
@@ -425,8 +720,8 @@ def execute_plan(plan, df, metadata):
                 'Count': counts,
                 'Percentage': (counts / counts.sum() * 100).round(2)
             })
-            median = values.median()
-            mean = values.mean()
+            median = fast_median(values)
+            mean = float(values.mean(dtype=np.float64)) if values.size else float('nan')
             explanation = (f"Histogram of **{amount_col}**: "
                          f"Mean = **{format_currency(mean)}**, "
                          f"Median = **{format_currency(median)}**. "
@@ -473,10 +768,10 @@ def execute_plan(plan, df, metadata):
             filtered, actual_group = resolve_group_column(filtered, group_by, metadata)
             if actual_group in filtered.columns:
                 if use_count:
-                    grouped = filtered.groupby(actual_group).size().reset_index(name='Count')
+                    grouped = _group_counts(filtered, actual_group)
                     grouped = grouped.sort_values('Count', ascending=False)
                 else:
-                    grouped = filtered.groupby(actual_group)[metric_col].sum().reset_index()
+                    grouped = _aggregate(filtered, actual_group, metric_col, 'sum')
                     grouped = grouped.sort_values(metric_col, ascending=False)
                 result_df = grouped.head(20)
                 explanation = f"Results grouped by **{actual_group}** ({agg})."
@@ -4,7 +4,7 @@ Simulates parameter changes and shows before/after impact on KPIs.
 """
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, format_number, format_pct, safe_divide
+from src.utils import format_currency, format_number, format_pct, safe_divide, count_value, fast_median
 
 
 SCENARIOS = {
@@ -58,49 +58,46 @@ def simulate_scenario(df, metadata, scenario_type, param_value):
     if not amount_col:
         return {'error': 'No amount column detected.'}
 
+    amount = df[amount_col].to_numpy(dtype=float, na_value=np.nan)
+    status = df[status_col] if status_col else None
+    fraud = df[fraud_col].to_numpy(na_value=0) if fraud_col else None
+
     # Current KPIs
-    current = _compute_kpis(df, roles)
+    current = _compute_kpis(len(df), amount, status, fraud)
 
-    # Simulate
-    sim_df = df.copy()
+    # Simulate on copies of just the columns a scenario changes, never the whole frame
+    n_rows = len(df)
+    after = None
 
     if scenario_type == 'value_increase':
         factor = 1 + (param_value / 100)
-        sim_df[amount_col] = sim_df[amount_col] * factor
+        amount = amount * factor
         action_desc = f"transaction values increased by {param_value}%"
 
     elif scenario_type == 'value_decrease':
         factor = 1 - (param_value / 100)
-        sim_df[amount_col] = sim_df[amount_col] * factor
+        amount = amount * factor
         action_desc = f"transaction values decreased by {param_value}%"
 
     elif scenario_type == 'volume_increase':
-        # Duplicate a percentage of rows to simulate volume increase
-        n_extra = int(len(sim_df) * param_value / 100)
-        extra_rows = sim_df.sample(n=min(n_extra, len(sim_df)), replace=True, random_state=42)
-        sim_df = pd.concat([sim_df, extra_rows], ignore_index=True)
+        # More rows drawn from the same mix: totals scale, averages and rates stay put
+        n_extra = min(int(n_rows * param_value / 100), n_rows)
+        after = _scale_volume_kpis(current, safe_divide(n_rows + n_extra, n_rows))
         action_desc = f"transaction volume increased by {param_value}%"
 
     elif scenario_type == 'fraud_rate_change':
         if fraud_col:
-            current_fraud_count = int(sim_df[fraud_col].sum())
-            target_fraud_count = int(len(sim_df) * param_value / 100)
+            fraud = fraud.copy()
+            current_fraud_count = int(fraud.sum(dtype=np.int64))
+            target_fraud_count = int(n_rows * param_value / 100)
             diff = target_fraud_count - current_fraud_count
 
             if diff > 0:
                 # Add more fraud flags
-                non_fraud_mask = sim_df[fraud_col] == 0
-                non_fraud_indices = sim_df[non_fraud_mask].index.tolist()
-                flip_count = min(diff, len(non_fraud_indices))
-                flip_indices = np.random.choice(non_fraud_indices, size=flip_count, replace=False)
-                sim_df.loc[flip_indices, fraud_col] = 1
+                _flip_values(fraud, 0, 1, diff)
             elif diff < 0:
                 # Remove fraud flags
-                fraud_mask = sim_df[fraud_col] == 1
-                fraud_indices = sim_df[fraud_mask].index.tolist()
-                flip_count = min(abs(diff), len(fraud_indices))
-                flip_indices = np.random.choice(fraud_indices, size=flip_count, replace=False)
-                sim_df.loc[flip_indices, fraud_col] = 0
+                _flip_values(fraud, 1, 0, -diff)
 
             action_desc = f"fraud rate changed to {param_value}%"
         else:
@@ -108,22 +105,22 @@ def simulate_scenario(df, metadata, scenario_type, param_value):
 
     elif scenario_type == 'failure_rate_change':
         if status_col:
-            current_fail_count = len(sim_df[sim_df[status_col] == 'FAILED'])
-            target_fail_count = int(len(sim_df) * param_value / 100)
+            # Flip a writable copy of the backing array, not through the Series indexer
+            if isinstance(status.dtype, pd.CategoricalDtype):
+                # Flips may introduce a status the Categorical has never seen
+                missing = [v for v in ('SUCCESS', 'FAILED') if v not in status.cat.categories]
+                values = status.array.add_categories(missing)
+            else:
+                values = status.to_numpy(copy=True)
+            current_fail_count = count_value(status, 'FAILED')
+            target_fail_count = int(n_rows * param_value / 100)
             diff = target_fail_count - current_fail_count
 
             if diff > 0:
-                success_mask = sim_df[status_col] == 'SUCCESS'
-                success_indices = sim_df[success_mask].index.tolist()
-                flip_count = min(diff, len(success_indices))
-                flip_indices = np.random.choice(success_indices, size=flip_count, replace=False)
-                sim_df.loc[flip_indices, status_col] = 'FAILED'
+                _flip_values(values, 'SUCCESS', 'FAILED', diff)
             elif diff < 0:
-                fail_mask = sim_df[status_col] == 'FAILED'
-                fail_indices = sim_df[fail_mask].index.tolist()
-                flip_count = min(abs(diff), len(fail_indices))
-                flip_indices = np.random.choice(fail_indices, size=flip_count, replace=False)
-                sim_df.loc[flip_indices, status_col] = 'SUCCESS'
+                _flip_values(values, 'FAILED', 'SUCCESS', -diff)
+            status = pd.Series(values, index=status.index, name=status.name)
 
             action_desc = f"failure rate changed to {param_value}%"
         else:
@@ -132,7 +129,8 @@ def simulate_scenario(df, metadata, scenario_type, param_value):
         return {'error': f'Unknown scenario type: {scenario_type}'}
 
     # After KPIs
-    after = _compute_kpis(sim_df, roles)
+    if after is None:
+        after = _compute_kpis(n_rows, amount, status, fraud)
 
     # Build comparison DataFrame
     metrics = list(current.keys())
@@ -170,34 +168,63 @@ def simulate_scenario(df, metadata, scenario_type, param_value):
     }
 
 
-def _compute_kpis(df, roles):
-    """Compute standard KPIs for simulation comparison."""
-    amount_col = roles.get('amount')
-    status_col = roles.get('status')
-    fraud_col = roles.get('fraud')
+def _sample_positions(mask, count, seed=42):
+    """
+    Up to `count` distinct row positions where `mask` is True, drawn without replacement
+    from a generator seeded like the volume scenario's sample, so reruns flip the same rows.
+    """
+    candidates = np.flatnonzero(mask)
+    rng = np.random.default_rng(seed)
+    return rng.choice(candidates, size=min(count, candidates.size), replace=False, shuffle=False)
+
+
+def _flip_values(values, old_value, new_value, count, seed=42):
+    """Set up to `count` random entries of `values` equal to old_value to new_value, in place."""
+    values[_sample_positions(values == old_value, count, seed)] = new_value
+    return values
 
+
+def _compute_kpis(n_rows, amount, status=None, fraud=None):
+    """
+    Compute standard KPIs for simulation comparison from the columns they read:
+    `amount` as a float ndarray, `status` a Series, `fraud` an ndarray (None when absent).
+    """
     kpis = {}
-    kpis['Total Transactions'] = len(df)
+    kpis['Total Transactions'] = n_rows
 
-    if amount_col:
-        kpis['Total Value (INR)'] = round(float(df[amount_col].sum()), 2)
-        kpis['Average Value (INR)'] = round(float(df[amount_col].mean()), 2)
-        kpis['Median Value (INR)'] = round(float(df[amount_col].median()), 2)
-        kpis['Max Transaction (INR)'] = round(float(df[amount_col].max()), 2)
+    if amount is not None:
+        kpis['Total Value (INR)'] = round(float(np.nansum(amount)), 2)
+        kpis['Average Value (INR)'] = round(float(np.nanmean(amount)), 2)
+        kpis['Median Value (INR)'] = round(fast_median(amount), 2)
+        kpis['Max Transaction (INR)'] = round(float(np.nanmax(amount)), 2)
 
-    if status_col:
-        total = len(df)
-        failed = len(df[df[status_col] == 'FAILED'])
-        kpis['Failure Rate %'] = round(safe_divide(failed, total) * 100, 3)
-        kpis['Success Count'] = total - failed
+    if status is not None:
+        failed = count_value(status, 'FAILED')
+        kpis['Failure Rate %'] = round(safe_divide(failed, n_rows) * 100, 3)
+        kpis['Success Count'] = n_rows - failed
 
-    if fraud_col:
-        kpis['Fraud Count'] = int(df[fraud_col].sum())
-        kpis['Fraud Rate %'] = round(safe_divide(int(df[fraud_col].sum()), len(df)) * 100, 4)
+    if fraud is not None:
+        fraud_count = int(fraud.sum(dtype=np.int64))
+        kpis['Fraud Count'] = fraud_count
+        kpis['Fraud Rate %'] = round(safe_divide(fraud_count, n_rows) * 100, 4)
 
     return kpis
 
 
+def _scale_volume_kpis(kpis, ratio):
+    """
+    KPIs after resampling the rows to `ratio` times the volume: counts and totals scale,
+    per-transaction values and rates are those of the current data.
+    """
+    scaled = dict(kpis)
+    for metric in ('Total Transactions', 'Success Count', 'Fraud Count'):
+        if metric in scaled:
+            scaled[metric] = int(round(kpis[metric] * ratio))
+    if 'Total Value (INR)' in scaled:
+        scaled['Total Value (INR)'] = round(kpis['Total Value (INR)'] * ratio, 2)
+    return scaled
+
+
 def get_available_scenarios(metadata):
     """Return available scenarios based on dataset columns."""
     roles = metadata.get('roles', {})
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402,F401  (api.upload imports from main)
+from api import upload  # noqa: E402
+
+
+def _export(df):
+    datetime_cols = df.select_dtypes(include=["datetime64"]).columns.tolist()
+    parts = upload._csv_chunks(df, datetime_cols)
+    return b"".join(p.encode() if isinstance(p, str) else p for p in parts)
+
+
+def _transactions(n=250):
+    rng = np.random.default_rng(0)
+    times = pd.Series(pd.date_range("2024-01-01 08:30", periods=n, freq="37min"))
+    times[::17] = pd.NaT
+    return pd.DataFrame({
+        "transaction_id": np.arange(n, dtype="int32"),
+        "transaction_type": pd.Categorical(rng.choice(["P2P", "Bill Payment", "Recharge"], n)),
+        "state": rng.choice(["Tamil Nadu", "Delhi", "Uttar Pradesh"], n).astype(object),
+        "fraud_flag": rng.integers(0, 2, n).astype("int8"),
+        "timestamp": times,
+        "date": pd.Series(pd.date_range("2024-01-01", periods=n, freq="D")),
+    })
+
+
+@pytest.mark.parametrize("chunk_rows", [50_000, 64])
+def test_export_matches_to_csv(monkeypatch, chunk_rows):
+    monkeypatch.setattr(upload, "EXPORT_CHUNK_ROWS", chunk_rows)
+    df = _transactions()
+    assert _export(df) == df.to_csv(index=False).encode()
+
+
+def test_export_fallback_values_match_to_csv(monkeypatch):
+    monkeypatch.setattr(upload, "EXPORT_CHUNK_ROWS", 2)
+    df = pd.DataFrame({
+        "note": ["a", "b,c", 'say "hi"', "", None, "line\nbreak", " sp ", "cr\rx"],
+        "amount": [1.0, -2.0, 0.00001, np.nan, 3.5, 100.0, 2.25, 0.0],
+        "flag": [True, False, True, False, True, False, True, False],
+        "count": pd.array([1, None, 3, 4, 5, 6, 7, 8], dtype="Int64"),
+    })
+    assert _export(df) == df.to_csv(index=False).encode()
+    assert _export(df[["note"]]) == df[["note"]].to_csv(index=False).encode()
@@ -8,6 +8,19 @@ import { KpiSkeleton } from '../components/LoadingSkeleton'
 import LoadingSkeleton from '../components/LoadingSkeleton'
 import { Upload as UploadIcon, FileUp, RotateCcw, Download, Database, Table2, BarChart3, Columns3, AlertCircle, CheckCircle } from 'lucide-react'
 
+function profileFromSchema(res, schema) {
+    return {
+        ...res,
+        ...schema,
+        column_summary: Object.entries(schema.column_details || {}).map(([col, info]) => ({
+            Column: col, Type: info.dtype,
+            Missing: `${info.missing} (${info.missing_pct}%)`,
+            Unique: info.unique,
+            Sample: String(info.mean ?? JSON.stringify(info.top_values || {})).slice(0, 60),
+        })),
+    }
+}
+
 export default function Upload() {
     const [profile, setProfile] = useState(null)
     const [preview, setPreview] = useState(null)
@@ -26,9 +39,9 @@ export default function Upload() {
 
         try {
             const result = await api.upload(file)
-            setProfile(result)
-            // Load preview
-            const prev = await api.preview(50)
+            // Upload returns only counts; the profile comes from the (cached) schema
+            const [schema, prev] = await Promise.all([api.schema(), api.preview(50)])
+            setProfile(profileFromSchema(result, schema))
             setPreview(prev)
         } catch (e) {
             setError(e.message)
@@ -52,17 +65,8 @@ export default function Upload() {
             setProfile(null)
             setPreview(null)
             // Reload profile from schema
-            const schema = await api.schema()
-            setProfile({
-                ...res,
-                ...schema,
-                column_summary: Object.entries(schema.column_details || {}).map(([col, info]) => ({
-                    Column: col, Type: info.dtype,
-                    Missing: `${info.missing} (${info.missing_pct}%)`,
-                    Unique: info.unique,
-                })),
-            })
-            const prev = await api.preview(50)
+            const [schema, prev] = await Promise.all([api.schema(), api.preview(50)])
+            setProfile(profileFromSchema(res, schema))
             setPreview(prev)
         } catch (e) { setError(e.message) }
         setUploading(false)
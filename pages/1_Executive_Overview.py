@@ -19,7 +19,7 @@ amount_col = roles.get('amount')
 date_col = roles.get('date')
 region_col = roles.get('region')
 
-from src.utils import format_currency, format_number, safe_divide
+from src.utils import format_currency, format_number, safe_divide, count_value, group_sum
 from src.risk_analyzer import compute_risk_summary
 from src.data_profiler import get_descriptive_stats
 
@@ -46,7 +46,7 @@ c2.metric("Total Value", format_currency(df[amount_col].sum()))
 c3.metric("Avg Transaction", format_currency(df[amount_col].mean()))
 
 if date_col:
-    monthly = df.set_index(date_col).resample('M')[amount_col].sum()
+    monthly = df.set_index(date_col).resample('ME')[amount_col].sum()
     if len(monthly) >= 2:
         last_growth = ((monthly.iloc[-1] / monthly.iloc[-2]) - 1) * 100
         c4.metric("Last Month Growth", f"{last_growth:+.1f}%")
@@ -59,7 +59,7 @@ c5.metric("Risk Index", f"{risk.get('risk_index', 0)}/100", risk.get('risk_level
 c6, c7, c8, c9 = st.columns(4)
 if status_col:
     total = len(df)
-    failed = len(df[df[status_col] == 'FAILED'])
+    failed = count_value(df[status_col], 'FAILED')
     c6.metric("Success Rate", f"{safe_divide(total - failed, total) * 100:.1f}%")
     c7.metric("Failed Txns", format_number(failed))
 if fraud_col:
@@ -82,7 +82,7 @@ CHART_COLORS = ["#4f46e5", "#7c3aed", "#0d9488", "#3b82f6", "#ec4899", "#f59e0b"
 
 with col1:
     if date_col:
-        monthly_data = df.set_index(date_col).resample('M').agg({amount_col: ['sum', 'count']}).reset_index()
+        monthly_data = df.set_index(date_col).resample('ME').agg({amount_col: ['sum', 'count']}).reset_index()
         monthly_data.columns = ['Month', 'Total Value', 'Volume']
         fig = px.line(monthly_data, x='Month', y='Total Value',
                      title="Monthly Transaction Value",
@@ -94,7 +94,7 @@ with col1:
 
 with col2:
     if region_col:
-        top_states = df.groupby(region_col)[amount_col].sum().nlargest(10).reset_index()
+        top_states = group_sum(df, region_col, amount_col).nlargest(10).reset_index()
         top_states.columns = ['State', 'Total Value']
         fig = px.bar(top_states, x='Total Value', y='State', orientation='h',
                     title="Top 10 States",
@@ -110,7 +110,7 @@ col3, col4 = st.columns(2)
 with col3:
     cat_col = roles.get('category')
     if cat_col:
-        cat_data = df.groupby(cat_col)[amount_col].sum().reset_index()
+        cat_data = group_sum(df, cat_col, amount_col).reset_index()
         cat_data.columns = ['Category', 'Total Value']
         fig = px.pie(cat_data, values='Total Value', names='Category',
                     title="Value by Category", hole=0.45,
@@ -58,10 +58,10 @@ with tab1:
 
         if actual_col in work_df.columns:
             if metric == 'Count':
-                result = work_df.groupby(actual_col).size().reset_index(name='Count')
+                result = work_df.groupby(actual_col, observed=True).size().reset_index(name='Count')
                 sort_col = 'Count'
             else:
-                result = work_df.groupby(actual_col)[metric].agg(agg_func).reset_index()
+                result = work_df.groupby(actual_col, observed=True)[metric].agg(agg_func).reset_index()
                 result[metric] = result[metric].round(2)
                 sort_col = metric
 
@@ -18,7 +18,7 @@ roles = metadata.get('roles', {})
 amount_col = roles.get('amount')
 
 from src.risk_analyzer import compute_risk_summary, compute_concentration_metrics, compute_volatility_index
-from src.utils import format_currency, format_number, safe_divide
+from src.utils import format_currency, format_number, safe_divide, count_value, group_sum
 
 CHART_TEMPLATE = "plotly_white"
 CHART_COLORS = ["#4f46e5", "#7c3aed", "#0d9488", "#3b82f6", "#ec4899", "#f59e0b"]
@@ -46,7 +46,7 @@ c2.metric("Concentration (HHI)", f"{risk.get('hhi', 0):.0f}")
 status_col = roles.get('status')
 fraud_col = roles.get('fraud')
 if status_col:
-    failed = len(df[df[status_col] == 'FAILED'])
+    failed = count_value(df[status_col], 'FAILED')
     c3.metric("Failure Rate", f"{safe_divide(failed, len(df)) * 100:.2f}%")
 if fraud_col:
     c4.metric("Fraud Rate", f"{safe_divide(int(df[fraud_col].sum()), len(df)) * 100:.4f}%")
@@ -68,7 +68,7 @@ else:
 # Concentration Analysis
 st.markdown('<div class="section-label">Market Concentration</div>', unsafe_allow_html=True)
 
-group_values = df.groupby(dimension)[amount_col].sum().sort_values(ascending=False).reset_index()
+group_values = group_sum(df, dimension, amount_col).sort_values(ascending=False).reset_index()
 group_values.columns = ['Entity', 'Total Value']
 total = group_values['Total Value'].sum()
 group_values['Share %'] = (group_values['Total Value'] / total * 100).round(2)
@@ -111,7 +111,7 @@ if date_col:
         c2.metric("Monthly Std Dev", format_currency(vol.get('monthly_std', 0)))
         c3.metric("Monthly Mean", format_currency(vol.get('monthly_mean', 0)))
 
-        monthly = df.set_index(date_col).resample('M')[amount_col].sum().reset_index()
+        monthly = df.set_index(date_col).resample('ME')[amount_col].sum().reset_index()
         monthly.columns = ['Month', 'Value']
         fig = px.line(monthly, x='Month', y='Value', markers=True,
                      template=CHART_TEMPLATE, color_discrete_sequence=[CHART_COLORS[0]])
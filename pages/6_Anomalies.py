@@ -46,15 +46,15 @@ with c_thresh:
 
 with st.spinner("Detecting anomalies..."):
     if method == 'iqr':
-        anomalies, stats = detect_iqr_anomalies(df, amount_col, multiplier=iqr_mult)
+        anomalies, stats = detect_iqr_anomalies(df, amount_col, multiplier=iqr_mult, stats=metadata.get('amount_stats'))
         results = {'IQR Method': {'anomalies': anomalies, 'stats': stats, 'count': len(anomalies),
             'description': f"Found {len(anomalies)} anomalies using IQR ({iqr_mult}x). Bounds: [{stats['lower']:.0f}, {stats['upper']:.0f}]"}}
     elif method == 'zscore':
-        anomalies, stats = detect_zscore_anomalies(df, amount_col, threshold=zscore_thresh)
+        anomalies, stats = detect_zscore_anomalies(df, amount_col, threshold=zscore_thresh, stats=metadata.get('amount_stats'))
         results = {'Z-Score Method': {'anomalies': anomalies, 'stats': stats, 'count': len(anomalies),
             'description': f"Found {len(anomalies)} anomalies with |Z| > {zscore_thresh}"}}
     elif method == 'percentile':
-        anomalies, stats = detect_percentile_anomalies(df, amount_col)
+        anomalies, stats = detect_percentile_anomalies(df, amount_col, stats=metadata.get('amount_stats'))
         results = {'Percentile': {'anomalies': anomalies, 'stats': stats, 'count': len(anomalies),
             'description': f"Found {len(anomalies)} anomalies outside 1st-99th percentile"}}
     else:
@@ -11,13 +11,18 @@ def compare_groups(df, column, group_a, group_b, amount_col, metadata=None):
     Compare two groups within a categorical column.
     Returns comparison metrics and DataFrames.
     """
-    df_a = df[df[column].str.lower() == group_a.lower()]
-    df_b = df[df[column].str.lower() == group_b.lower()]
-
-    if len(df_a) == 0 and len(df_b) == 0:
+    labels = df[column].str.lower()
+    key_a, key_b = group_a.lower(), group_b.lower()
+    mask = labels.isin([key_a, key_b]).to_numpy()
+    if not mask.any():
         return None
 
-    metrics = _compute_comparison(df_a, df_b, amount_col, group_a, group_b)
+    # One groupby over the matching rows instead of a filter per group
+    grouped = df[amount_col][mask].groupby(labels[mask], sort=False).agg(['size', 'sum', 'mean', 'median', 'max'])
+    stats_a = _stats_row(grouped, key_a)
+    stats_b = _stats_row(grouped, key_b)
+
+    metrics = _build_comparison(stats_a, stats_b, group_a, group_b)
     return metrics
 
 
@@ -26,38 +31,61 @@ def compare_time_periods(df, date_col, amount_col, period_a, period_b):
     Compare two time periods (months, quarters).
     period_a, period_b: strings like '2024-01', '2024-Q1', etc.
     """
-    df = df.copy()
-    df['_month'] = df[date_col].dt.to_period('M').astype(str)
-    df['_quarter'] = df[date_col].dt.to_period('Q').astype(str)
+    months = df[date_col].dt.to_period('M')
+    quarters = df[date_col].dt.to_period('Q')
+
+    # Try month match, then quarter
+    mask_a = _period_mask(months, period_a)
+    if mask_a is None:
+        mask_a = _period_mask(quarters, period_a)
+    mask_b = _period_mask(months, period_b)
+    if mask_b is None:
+        mask_b = _period_mask(quarters, period_b)
+
+    if mask_a is None and mask_b is None:
+        return None
 
-    # Try month match
-    df_a = df[df['_month'] == period_a]
-    df_b = df[df['_month'] == period_b]
+    values = df[amount_col]
+    stats_a = _amount_stats(values[mask_a]) if mask_a is not None else _amount_stats(values.iloc[:0])
+    stats_b = _amount_stats(values[mask_b]) if mask_b is not None else _amount_stats(values.iloc[:0])
 
-    if len(df_a) == 0:
-        df_a = df[df['_quarter'] == period_a]
-    if len(df_b) == 0:
-        df_b = df[df['_quarter'] == period_b]
+    metrics = _build_comparison(stats_a, stats_b, period_a, period_b)
+    return metrics
 
-    if len(df_a) == 0 and len(df_b) == 0:
-        return None
 
-    metrics = _compute_comparison(df_a, df_b, amount_col, period_a, period_b)
-    return metrics
+def _period_mask(periods, label):
+    """Row mask for the period whose string form equals label, or None if absent.
+    Only the distinct periods are formatted, not every row."""
+    for period in periods.unique():
+        if str(period) == label:
+            return (periods == period).to_numpy()
+    return None
+
+
+def _stats_row(grouped, key):
+    """Pull one group's aggregates out of compare_groups' groupby result."""
+    if key not in grouped.index:
+        return {'count': 0, 'sum': 0, 'mean': 0, 'median': 0, 'max': 0}
+    row = grouped.loc[key]
+    return {'count': int(row['size']), 'sum': row['sum'], 'mean': row['mean'],
+            'median': row['median'], 'max': row['max']}
+
+
+def _amount_stats(values):
+    """Count, sum, mean, median and max of an amount Series (zeros when empty)."""
+    if len(values) == 0:
+        return {'count': 0, 'sum': 0, 'mean': 0, 'median': 0, 'max': 0}
+    return {'count': len(values), 'sum': values.sum(), 'mean': values.mean(),
+            'median': values.median(), 'max': values.max()}
 
 
-def _compute_comparison(df_a, df_b, amount_col, label_a, label_b):
-    """Compute comparison table between two DataFrames."""
-    a_count = len(df_a)
-    b_count = len(df_b)
-    a_sum = df_a[amount_col].sum() if a_count > 0 else 0
-    b_sum = df_b[amount_col].sum() if b_count > 0 else 0
-    a_avg = df_a[amount_col].mean() if a_count > 0 else 0
-    b_avg = df_b[amount_col].mean() if b_count > 0 else 0
-    a_median = df_a[amount_col].median() if a_count > 0 else 0
-    b_median = df_b[amount_col].median() if b_count > 0 else 0
-    a_max = df_a[amount_col].max() if a_count > 0 else 0
-    b_max = df_b[amount_col].max() if b_count > 0 else 0
+def _build_comparison(stats_a, stats_b, label_a, label_b):
+    """Build the comparison table, chart data and explanation from two stat dicts."""
+    a_count, b_count = stats_a['count'], stats_b['count']
+    a_sum, b_sum = stats_a['sum'], stats_b['sum']
+    a_avg, b_avg = stats_a['mean'], stats_b['mean']
+    a_median, b_median = stats_a['median'], stats_b['median']
+    a_max, b_max = stats_a['max'], stats_b['max']
 
     comparison_df = pd.DataFrame({
         'Metric': ['Transaction Count', 'Total Value (INR)', 'Average Value (INR)',
@@ -109,9 +137,12 @@ def get_available_comparisons(df, metadata):
                             ('sender_bank', 'Sender Banks'), ('transaction_type', 'Transaction Types')]:
         col = roles.get(col_key)
         if col and col in df.columns:
+            series = df[col]
+            # Categoricals already hold their distinct values; no need to scan the rows
+            values = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.dropna().unique()
             comparisons[label] = {
                 'column': col,
-                'values': sorted(df[col].dropna().unique().tolist())
+                'values': sorted(values.tolist())
             }
 
     # Time-based comparisons
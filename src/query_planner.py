@@ -4,9 +4,10 @@ Uses keyword-based intent classification. No LLM. Zero hallucination.
 """
 import re
 import calendar
+from functools import lru_cache
+import pandas as pd
 from src.utils import safe_match_column
 
-
 # --- Intent Patterns ---
 INTENT_PATTERNS = {
     'total_volume': [
@@ -90,6 +91,29 @@ INTENT_PATTERNS = {
     ],
 }
 
+# Compiled once at import; classify_intent runs every pattern on every query
+_INTENT_REGEXES = {intent: [re.compile(p) for p in patterns] for intent, patterns in INTENT_PATTERNS.items()}
+
+# --- Extraction patterns ---
+_TOP_K_RE = re.compile(r'\btop\s*(\d+)')
+_BOTTOM_K_RE = re.compile(r'\bbottom\s*(\d+)')
+_N_LARGEST_RE = re.compile(r'(\d+)\s*(largest|biggest|highest|lowest|smallest)')
+_AMT_GT_RE = re.compile(r'(?:above|over|greater than|more than|>)\s*(?:₹|rs\.?|inr)?\s*([\d,]+)')
+_AMT_LT_RE = re.compile(r'(?:below|under|less than|<)\s*(?:₹|rs\.?|inr)?\s*([\d,]+)')
+_DATE_RANGE_RE = re.compile(r'(?:between|from)\s+(\w+)\s*(?:to|and|-)\s*(\w+)')
+_YEAR_RE = re.compile(r'(20\d{2})')
+_CMP_PATTERNS = [
+    re.compile(r'compare\s+(.+?)\s+(?:vs|versus|and|with)\s+(.+?)(?:\s|$)'),
+    re.compile(r'(?:difference|comparison)\s+between\s+(.+?)\s+and\s+(.+?)(?:\s|$)'),
+    re.compile(r'(.+?)\s+vs\.?\s+(.+?)(?:\s|$)'),
+]
+
+# Full and abbreviated month names → month number
+_ALL_MONTHS = {
+    **{name.lower(): num for num, name in enumerate(calendar.month_name) if num},
+    **{name.lower(): num for num, name in enumerate(calendar.month_abbr) if num},
+}
+
 # --- Aggregation keywords ---
 AGG_KEYWORDS = {
     'sum': ['sum', 'total', 'aggregate', 'combined', 'overall'],
@@ -140,15 +164,46 @@ GROUPBY_KEYWORDS = {
     'weekend': ['weekend', 'weekday'],
 }
 
+# --- Filter / metric keywords ---
+_STATUS_WORDS = ['success', 'fail', 'fraud', 'non-fraud']
+_TXN_TYPES = ['P2P', 'P2M', 'Bill Payment', 'Recharge']
+# Lowercase mention → filter value, in the order filters are emitted
+_STATES = {state: state.title() for state in [
+    'delhi', 'maharashtra', 'karnataka', 'tamil nadu', 'uttar pradesh',
+    'gujarat', 'rajasthan', 'telangana', 'andhra pradesh', 'west bengal']}
+_CATEGORIES = {cat: cat.title() for cat in [
+    'food', 'shopping', 'grocery', 'fuel', 'utilities', 'entertainment',
+    'healthcare', 'education', 'transport', 'other']}
+_AMOUNT_WORDS = ['amount', 'value', 'revenue', 'money', 'inr', 'rupee', 'spent', 'spending']
+_COUNT_WORDS = ['count', 'volume', 'number', 'transactions', 'how many']
+
+# Every keyword the extractors look for, matched against a query once per query
+_KEYWORDS = frozenset(
+    [kw for kws in AGG_KEYWORDS.values() for kw in kws]
+    + [kw for kws in GROUPBY_KEYWORDS.values() for kw in kws]
+    + _STATUS_WORDS + [tt.lower() for tt in _TXN_TYPES] + list(_STATES) + list(_CATEGORIES)
+    + _AMOUNT_WORDS + _COUNT_WORDS
+)
+
+
+@lru_cache(maxsize=1024)
+def _keyword_hits(query_lower):
+    """
+    Set of _KEYWORDS occurring as substrings of query_lower. plan_query's extractors all
+    test membership in this one set instead of each re-scanning the query per keyword.
+    """
+    return frozenset(kw for kw in _KEYWORDS if kw in query_lower)
+
 
+@lru_cache(maxsize=1024)
 def classify_intent(query):
     """Classify the intent of a natural language query."""
     query_lower = query.lower().strip()
     scores = {}
-    for intent, patterns in INTENT_PATTERNS.items():
+    for intent, patterns in _INTENT_REGEXES.items():
         score = 0
         for pattern in patterns:
-            if re.search(pattern, query_lower):
+            if pattern.search(query_lower):
                 score += 1
         if score > 0:
             scores[intent] = score
@@ -160,23 +215,25 @@ def classify_intent(query):
 
 def extract_aggregation(query):
     """Extract the aggregation function from query."""
-    query_lower = query.lower()
+    hits = _keyword_hits(query.lower())
     for agg, keywords in AGG_KEYWORDS.items():
         for kw in keywords:
-            if kw in query_lower:
+            if kw in hits:
                 return agg
     return 'sum'  # Default
 
 
+@lru_cache(maxsize=1024)
 def extract_top_k(query):
     """Extract the K value from top/bottom K queries."""
-    match = re.search(r'\btop\s*(\d+)', query.lower())
+    query_lower = query.lower()
+    match = _TOP_K_RE.search(query_lower)
     if match:
         return int(match.group(1))
-    match = re.search(r'\bbottom\s*(\d+)', query.lower())
+    match = _BOTTOM_K_RE.search(query_lower)
     if match:
         return int(match.group(1))
-    match = re.search(r'(\d+)\s*(largest|biggest|highest|lowest|smallest)', query.lower())
+    match = _N_LARGEST_RE.search(query_lower)
     if match:
         return int(match.group(1))
     return 10  # Default
@@ -184,12 +241,12 @@ def extract_top_k(query):
 
 def extract_groupby(query, metadata):
     """Extract group-by field from query, using metadata for column matching."""
-    query_lower = query.lower()
+    hits = _keyword_hits(query.lower())
     roles = metadata.get('roles', {})
 
     for group_key, keywords in GROUPBY_KEYWORDS.items():
         for kw in keywords:
-            if kw in query_lower:
+            if kw in hits:
                 # Map group_key to actual column
                 if group_key == 'month' and 'date' in roles:
                     return 'month'
@@ -222,59 +279,55 @@ def extract_filters(query, df):
     """Extract filter conditions from query."""
     filters = []
     query_lower = query.lower()
+    hits = _keyword_hits(query_lower)
 
     # Status filter
-    if 'success' in query_lower and 'fail' not in query_lower:
+    if 'success' in hits and 'fail' not in hits:
         status_col = safe_match_column(df, 'status')
         if status_col:
             filters.append({'column': status_col, 'op': '==', 'value': 'SUCCESS'})
-    elif 'fail' in query_lower and 'success' not in query_lower:
+    elif 'fail' in hits and 'success' not in hits:
         status_col = safe_match_column(df, 'status')
         if status_col:
             filters.append({'column': status_col, 'op': '==', 'value': 'FAILED'})
 
     # Fraud filter
-    if 'fraud' in query_lower and 'non-fraud' not in query_lower:
+    if 'fraud' in hits and 'non-fraud' not in hits:
         fraud_col = safe_match_column(df, 'fraud')
         if fraud_col:
             filters.append({'column': fraud_col, 'op': '==', 'value': 1})
 
     # Transaction type filter
-    for tt in ['P2P', 'P2M', 'Bill Payment', 'Recharge']:
-        if tt.lower() in query_lower:
+    for tt in _TXN_TYPES:
+        if tt.lower() in hits:
             tt_col = safe_match_column(df, 'transaction type')
             if tt_col:
                 filters.append({'column': tt_col, 'op': '==', 'value': tt})
                 break
 
     # Specific state mentions
-    states = ['delhi', 'maharashtra', 'karnataka', 'tamil nadu', 'uttar pradesh',
-              'gujarat', 'rajasthan', 'telangana', 'andhra pradesh', 'west bengal']
-    for state in states:
-        if state in query_lower:
-            state_col = safe_match_column(df, 'state')
-            if state_col:
-                filters.append({'column': state_col, 'op': '==', 'value': state.title()})
+    states = [value for state, value in _STATES.items() if state in hits]
+    if states:
+        state_col = safe_match_column(df, 'state')
+        if state_col:
+            filters.extend({'column': state_col, 'op': '==', 'value': value} for value in states)
 
     # Specific category mentions
-    categories = ['food', 'shopping', 'grocery', 'fuel', 'utilities', 'entertainment',
-                  'healthcare', 'education', 'transport', 'other']
-    for cat in categories:
-        if cat in query_lower:
-            cat_col = safe_match_column(df, 'category')
-            if cat_col:
-                filters.append({'column': cat_col, 'op': '==', 'value': cat.title()})
-                break
+    categories = [value for cat, value in _CATEGORIES.items() if cat in hits]
+    if categories:
+        cat_col = safe_match_column(df, 'category')
+        if cat_col:
+            filters.append({'column': cat_col, 'op': '==', 'value': categories[0]})
 
     # Amount threshold
-    amount_match = re.search(r'(?:above|over|greater than|more than|>)\s*(?:₹|rs\.?|inr)?\s*([\d,]+)', query_lower)
+    amount_match = _AMT_GT_RE.search(query_lower)
     if amount_match:
         val = int(amount_match.group(1).replace(',', ''))
         amount_col = safe_match_column(df, 'amount')
         if amount_col:
             filters.append({'column': amount_col, 'op': '>', 'value': val})
 
-    amount_match2 = re.search(r'(?:below|under|less than|<)\s*(?:₹|rs\.?|inr)?\s*([\d,]+)', query_lower)
+    amount_match2 = _AMT_LT_RE.search(query_lower)
     if amount_match2:
         val = int(amount_match2.group(1).replace(',', ''))
         amount_col = safe_match_column(df, 'amount')
@@ -282,24 +335,18 @@ def extract_filters(query, df):
             filters.append({'column': amount_col, 'op': '<', 'value': val})
 
     # Date range filter
-    month_names = {name.lower(): num for num, name in enumerate(calendar.month_name) if num}
-    month_abbrs = {name.lower(): num for num, name in enumerate(calendar.month_abbr) if num}
-    all_months = {**month_names, **month_abbrs}
-
-    date_range_pattern = r'(?:between|from)\s+(\w+)\s*(?:to|and|-)\s*(\w+)'
-    date_match = re.search(date_range_pattern, query_lower)
+    date_match = _DATE_RANGE_RE.search(query_lower)
     if date_match:
         start_str = date_match.group(1).strip()
         end_str = date_match.group(2).strip()
-        if start_str in all_months and end_str in all_months:
+        if start_str in _ALL_MONTHS and end_str in _ALL_MONTHS:
             # Extract year if mentioned
-            year_match = re.search(r'(20\d{2})', query_lower)
+            year_match = _YEAR_RE.search(query_lower)
             year = int(year_match.group(1)) if year_match else 2024
-            start_month = all_months[start_str]
-            end_month = all_months[end_str]
+            start_month = _ALL_MONTHS[start_str]
+            end_month = _ALL_MONTHS[end_str]
             date_col_match = safe_match_column(df, 'timestamp') or safe_match_column(df, 'date')
             if date_col_match:
-                import pandas as pd
                 start_date = pd.Timestamp(year=year, month=start_month, day=1)
                 end_date = pd.Timestamp(year=year, month=end_month, day=1) + pd.offsets.MonthEnd(1)
                 filters.append({'column': date_col_match, 'op': '>=', 'value': start_date})
@@ -310,12 +357,12 @@ def extract_filters(query, df):
 
 def extract_metric_column(query, metadata):
     """Determine which column to compute metrics on."""
-    query_lower = query.lower()
+    hits = _keyword_hits(query.lower())
     roles = metadata.get('roles', {})
 
-    if any(kw in query_lower for kw in ['amount', 'value', 'revenue', 'money', 'inr', 'rupee', 'spent', 'spending']):
+    if any(kw in hits for kw in _AMOUNT_WORDS):
         return roles.get('amount', None)
-    if any(kw in query_lower for kw in ['count', 'volume', 'number', 'transactions', 'how many']):
+    if any(kw in hits for kw in _COUNT_WORDS):
         return '__count__'
 
     # Default to amount for value-related intents
@@ -328,13 +375,8 @@ def extract_comparison_entities(query, df, metadata):
     roles = metadata.get('roles', {})
 
     # Pattern: "compare X vs Y" or "X versus Y" or "difference between X and Y"
-    patterns = [
-        r'compare\s+(.+?)\s+(?:vs|versus|and|with)\s+(.+?)(?:\s|$)',
-        r'(?:difference|comparison)\s+between\s+(.+?)\s+and\s+(.+?)(?:\s|$)',
-        r'(.+?)\s+vs\.?\s+(.+?)(?:\s|$)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, query_lower)
+    for pattern in _CMP_PATTERNS:
+        match = pattern.search(query_lower)
         if match:
             entity_a = match.group(1).strip()
             entity_b = match.group(2).strip()
@@ -343,6 +385,77 @@ def extract_comparison_entities(query, df, metadata):
     return None, None
 
 
+# --- Intent-specific plan refinements (mutate the plan in place) ---
+def _refine_trend(plan, query, df, metadata):
+    if not plan['group_by']:
+        plan['group_by'] = 'month'
+    plan['visualization'] = 'line'
+
+
+def _refine_month_over_month(plan, query, df, metadata):
+    plan['group_by'] = 'month'
+    plan['visualization'] = 'bar'
+
+
+def _refine_comparison(plan, query, df, metadata):
+    entity_a, entity_b = extract_comparison_entities(query, df, metadata)
+    plan['compare_a'] = entity_a
+    plan['compare_b'] = entity_b
+
+
+def _refine_distribution(plan, query, df, metadata):
+    if not plan['group_by']:
+        # Try to find a sensible categorical grouping
+        roles = metadata.get('roles', {})
+        plan['group_by'] = roles.get('category', roles.get('region', None))
+    plan['visualization'] = 'pie'
+
+
+def _refine_top_k(plan, query, df, metadata):
+    if not plan['group_by']:
+        roles = metadata.get('roles', {})
+        plan['group_by'] = roles.get('region', roles.get('category', None))
+    plan['visualization'] = 'bar'
+
+
+def _refine_metric(plan, query, df, metadata):
+    plan['visualization'] = 'metric'
+
+
+def _refine_peak(plan, query, df, metadata):
+    if not plan['group_by']:
+        plan['group_by'] = 'month'
+
+
+def _refine_histogram(plan, query, df, metadata):
+    plan['visualization'] = 'histogram'
+
+
+def _refine_forecast(plan, query, df, metadata):
+    plan['visualization'] = 'line'
+
+
+def _refine_scenario(plan, query, df, metadata):
+    plan['visualization'] = 'table'
+
+
+_INTENT_REFINERS = {
+    'trend_analysis': _refine_trend,
+    'month_over_month': _refine_month_over_month,
+    'comparison': _refine_comparison,
+    'distribution': _refine_distribution,
+    'top_k': _refine_top_k,
+    'bottom_k': _refine_top_k,
+    'total_volume': _refine_metric,
+    'total_value': _refine_metric,
+    'average_value': _refine_metric,
+    'peak_analysis': _refine_peak,
+    'histogram': _refine_histogram,
+    'forecast': _refine_forecast,
+    'scenario': _refine_scenario,
+}
+
+
 def plan_query(query, df, metadata):
     """
     Convert a natural language query into a structured execution plan.
@@ -368,47 +481,8 @@ def plan_query(query, df, metadata):
     }
 
     # Refine plan based on intent
-    if intent == 'trend_analysis':
-        if not group_by:
-            plan['group_by'] = 'month'
-        plan['visualization'] = 'line'
-
-    elif intent == 'month_over_month':
-        plan['group_by'] = 'month'
-        plan['visualization'] = 'bar'
-
-    elif intent == 'comparison':
-        entity_a, entity_b = extract_comparison_entities(query, df, metadata)
-        plan['compare_a'] = entity_a
-        plan['compare_b'] = entity_b
-
-    elif intent == 'distribution':
-        if not group_by:
-            # Try to find a sensible categorical grouping
-            roles = metadata.get('roles', {})
-            plan['group_by'] = roles.get('category', roles.get('region', None))
-        plan['visualization'] = 'pie'
-
-    elif intent in ('top_k', 'bottom_k'):
-        if not group_by:
-            roles = metadata.get('roles', {})
-            plan['group_by'] = roles.get('region', roles.get('category', None))
-        plan['visualization'] = 'bar'
-
-    elif intent in ('total_volume', 'total_value', 'average_value'):
-        plan['visualization'] = 'metric'
-
-    elif intent == 'peak_analysis':
-        if not group_by:
-            plan['group_by'] = 'month'
-
-    elif intent == 'histogram':
-        plan['visualization'] = 'histogram'
-
-    elif intent == 'forecast':
-        plan['visualization'] = 'line'
-
-    elif intent == 'scenario':
-        plan['visualization'] = 'table'
+    refine = _INTENT_REFINERS.get(intent)
+    if refine is not None:
+        refine(plan, query, df, metadata)
 
     return plan
@@ -3,7 +3,7 @@ Risk & Concentration Analysis Module — Herfindahl index, dominance, volatility
 """
 import pandas as pd
 import numpy as np
-from src.utils import format_currency, format_pct, safe_divide
+from src.utils import format_currency, format_pct, safe_divide, group_sum, count_value
 
 
 def compute_herfindahl_index(shares):
@@ -13,7 +13,7 @@ def compute_herfindahl_index(shares):
 
 def compute_concentration_metrics(df, group_col, value_col):
     """Compute full concentration analysis for a grouping."""
-    grouped = df.groupby(group_col)[value_col].sum().sort_values(ascending=False)
+    grouped = group_sum(df, group_col, value_col).sort_values(ascending=False)
     total = grouped.sum()
     shares = grouped / total
 
@@ -62,7 +62,7 @@ def compute_concentration_metrics(df, group_col, value_col):
 
 def compute_volatility_index(df, date_col, value_col):
     """Compute monthly volatility (coefficient of variation)."""
-    monthly = df.set_index(date_col).resample('M')[value_col].sum()
+    monthly = df.set_index(date_col).resample('ME')[value_col].sum()
     if len(monthly) < 2:
         return {'volatility_cv': 0, 'monthly_std': 0, 'monthly_mean': 0, 'interpretation': 'Insufficient data'}
 
@@ -112,7 +112,7 @@ def compute_risk_summary(df, metadata):
     # Failure Risk
     if status_col:
         total = len(df)
-        failed = len(df[df[status_col] == 'FAILED'])
+        failed = count_value(df[status_col], 'FAILED')
         risk_metrics['failure_rate'] = round(safe_divide(failed, total) * 100, 3)
 
     # Fraud Risk
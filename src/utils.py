@@ -4,26 +4,37 @@ Shared utility functions for the UPI Intelligence Platform.
 import pandas as pd
 import numpy as np
 import re
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 
 def format_currency(value):
     """Format number as INR currency string."""
     if pd.isna(value):
         return "N/A"
-    if abs(value) >= 1e7:
-        return f"₹{value/1e7:.2f} Cr"
-    elif abs(value) >= 1e5:
-        return f"₹{value/1e5:.2f} L"
-    elif abs(value) >= 1e3:
-        return f"₹{value/1e3:.1f}K"
-    else:
-        return f"₹{value:,.0f}"
+    return _format_currency(float(value))
 
 
 def format_number(value):
     """Format large numbers with K/L/Cr suffixes."""
     if pd.isna(value):
         return "N/A"
+    return _format_number(float(value))
+
+
+@lru_cache(maxsize=2048)
+def _format_currency(value):
+    """Cached body of format_currency (KPIs re-format the same totals on every rerun)."""
+    return "₹" + _format_number(value)
+
+
+@lru_cache(maxsize=2048)
+def _format_number(value):
+    """Cached body of format_number; `value` is a plain float so it hashes stably."""
     if abs(value) >= 1e7:
         return f"{value/1e7:.2f} Cr"
     elif abs(value) >= 1e5:
@@ -85,11 +96,117 @@ def get_categorical_columns(df):
     return df.select_dtypes(include=['object', 'category']).columns.tolist()
 
 
+def is_text_column(series):
+    """True for string-like columns: object dtype or pandas Categorical."""
+    return pd.api.types.is_object_dtype(series.dtype) or isinstance(series.dtype, pd.CategoricalDtype)
+
+
 def get_datetime_columns(df):
     """Get datetime column names."""
     return df.select_dtypes(include=['datetime64']).columns.tolist()
 
 
+def to_records(df):
+    """
+    DataFrame -> list of row dicts (like to_dict(orient="records")), built by Arrow
+    from the column buffers instead of pandas' per-cell Python loop.
+    """
+    if pa is not None:
+        try:
+            return pa.Table.from_pandas(df, preserve_index=False).to_pylist()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass  # Mixed-type object columns; fall back to pandas
+    return df.to_dict(orient="records")
+
+
+def group_codes(keys):
+    """
+    (codes, labels) for a grouping column: the stored codes of a categorical, else a sorted
+    pd.factorize. Missing keys get code -1.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), keys.cat.categories
+    return pd.factorize(keys, sort=True)
+
+
+def group_sum(df, group_col, value_col):
+    """
+    Same result as df.groupby(group_col, observed=True)[value_col].sum(), via np.bincount on
+    the column's integer codes. For low-cardinality keys (states, categories) this skips
+    pandas' groupby machinery, which dominates the cost of the actual reduction.
+    """
+    codes, labels = group_codes(df[group_col])
+    values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+
+    present = codes >= 0
+    codes, values = codes[present], values[present]
+    seen = np.bincount(codes, minlength=len(labels)) > 0
+    sums = np.bincount(codes, weights=np.nan_to_num(values), minlength=len(labels))
+    if pd.api.types.is_integer_dtype(df[value_col].dtype) or pd.api.types.is_bool_dtype(df[value_col].dtype):
+        sums = sums.astype(np.int64)
+    return pd.Series(sums[seen], index=pd.Index(labels[seen], name=group_col), name=value_col)
+
+
+def monthly_sum_count(df, date_col, value_col=None):
+    """
+    Monthly (sum, non-null count) of value_col, equivalent to
+    df.set_index(date_col).resample('ME')[value_col].agg(['sum', 'count']) but computed with
+    np.bincount on integer month codes, without building a DatetimeIndex.
+    With value_col=None the counts are rows per month, like resample('ME').size().
+    Returns (month_end: DatetimeIndex, sums: float ndarray, counts: int ndarray);
+    months with no rows are included with zeros, as resample does. The bins span only
+    the observed months, so a stray far-off date costs one small array, not a resample.
+    """
+    months = df[date_col].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    if value_col is None:
+        values = np.ones(len(df))
+    else:
+        values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+    has_date = ~np.isnat(months)
+    months, values = months[has_date], values[has_date]
+    if months.size == 0:
+        return pd.DatetimeIndex([]), np.array([], dtype=float), np.array([], dtype=np.int64)
+
+    first = months.min()
+    codes = (months - first).astype(np.int64)
+    n_months = int(codes.max()) + 1
+    has_value = ~np.isnan(values)
+    sums = np.bincount(codes[has_value], weights=values[has_value], minlength=n_months)
+    counts = np.bincount(codes[has_value], minlength=n_months)
+    month_end = pd.DatetimeIndex((first + np.arange(1, n_months + 1)).astype('datetime64[D]') - 1)
+    return month_end, sums, counts
+
+
+def fast_median(values):
+    """
+    Median of a numeric array/Series ignoring NaN, via a single np.partition (O(n)).
+    Same value as Series.median(); NaN if there are no values.
+    """
+    arr = np.asarray(values, dtype=float)
+    arr = arr[~np.isnan(arr)]
+    n = arr.size
+    if n == 0:
+        return float('nan')
+    k = n // 2
+    if n % 2:
+        return float(np.partition(arr, k)[k])
+    part = np.partition(arr, [k - 1, k])
+    return float((part[k - 1] + part[k]) / 2)
+
+
+def count_value(series, value):
+    """
+    Number of entries equal to value, without building a filtered frame. Categoricals
+    compare their integer codes against the value's code instead of the strings.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if value not in categories:
+            return 0
+        return int(np.count_nonzero(series.cat.codes.to_numpy() == categories.get_loc(value)))
+    return int(np.count_nonzero(series == value))
+
+
 def safe_divide(a, b):
     """Safe division avoiding ZeroDivisionError."""
     if b == 0 or pd.isna(b):